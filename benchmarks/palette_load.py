@@ -0,0 +1,103 @@
+"""
+Benchmark the time needed to load the color palettes.
+
+The palettes are loaded with the current BiDict and with a BiDict that
+inserts one pair at a time and checks for duplicate values by scanning
+all of the values inserted so far, as BiDict did before its duplicate
+checks became constant time.
+
+Usage:
+    python benchmarks/palette_load.py [--repeat N]
+"""
+
+import argparse
+import time
+import tomllib
+from collections.abc import Callable, Iterable, Mapping
+from importlib import resources
+
+from pixelate.utility.bidict import BiDict
+
+
+class LinearScanBiDict(BiDict):
+    """
+    BiDict inserting one pair at a time, as BiDict did before.
+
+    Each pair is checked against the values inserted so far by scanning
+    them, so that loading n colors takes quadratic time.
+    """
+
+    def update(
+        self, items: Mapping[str, str] | Iterable[tuple[str, str]]
+    ) -> None:
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            if key in self._dictionary or value in self._dictionary.values():
+                raise ValueError(f"Duplicate key or value: {key}, {value}.")
+            if key == value:
+                raise ValueError(
+                    f"The key and value cannot be the same: {key}"
+                )
+            self._dictionary[key] = value
+            self._dictionary[value] = key
+            self._keys.add(key)
+            self._values.add(value)
+
+
+def load_palettes() -> dict[str, dict[str, str]]:
+    """
+    Read every palette TOML file of the package.
+
+    Returns:
+        Mapping of palette names to their colors
+    """
+    palettes: dict[str, dict[str, str]] = {}
+    palette_assets = resources.files("pixelate.palette.assets")
+    for file_path in palette_assets.iterdir():
+        if file_path.name.endswith(".toml"):
+            palettes[file_path.name.removesuffix(".toml")] = tomllib.loads(
+                file_path.read_text(encoding="utf-8")
+            )
+    return palettes
+
+
+def best_time(build: Callable[[], object], repeat: int) -> float:
+    """
+    Measure the best wall time of a function over several runs.
+
+    Args:
+        build: Function to measure
+        repeat: Number of runs
+    Returns:
+        The best wall time in seconds
+    """
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    """Print the palette load time before and after."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    palettes = load_palettes()
+    print(f"{'palette':<10}{'colors':>8}{'before':>12}{'after':>12}")
+    for name, colors in sorted(palettes.items()):
+        before = best_time(
+            lambda: LinearScanBiDict(**colors),
+            args.repeat,
+        )
+        after = best_time(lambda: BiDict.from_items(colors), args.repeat)
+        print(
+            f"{name:<10}{len(colors):>8}"
+            f"{before * 1e3:>10.2f}ms{after * 1e3:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
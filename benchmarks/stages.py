@@ -0,0 +1,366 @@
+"""
+Benchmark the parse, resolve, render and save stages on synthetic grids.
+
+Markdown files are generated for every combination of grid size, number
+of colors and palette mix, then each stage is timed on its own:
+
+- parse: PixelArtParser.parse of the markdown file
+- resolve: resolve_color of every color of the frontmatter
+- render: ImageGenerator.generate of the parsed grid
+- save: Image.save of the rendered image
+
+The color caches are cleared before each parse and resolve run, so both
+measure cold lookups. The throughput is reported in cells per second,
+or colors per second for the resolve stage, along with the peak memory
+allocated through Python while running the stage once more under
+tracemalloc. Pillow allocates image buffers outside of Python, so they
+are not included.
+
+Results are saved as JSON, named after the current commit by default,
+and can be compared with the results of another commit.
+
+Usage:
+    python benchmarks/stages.py [--sizes 16,64] [--colors 2,16]
+        [--mixes hex,named] [--repeat N] [--output FILE]
+        [--compare FILE]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import PIL
+
+from pixelate import palette
+from pixelate.generator import ImageGenerator
+from pixelate.parser import PixelArtParser
+
+SIZES = (16, 64, 256, 1024, 4096)
+COLORS = (2, 16, 256)
+MIXES = ("hex", "named", "mixed")
+
+# Palette the named colors are drawn from, large enough for every count
+NAMED_PALETTE = "xkcd"
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def color_values(colors: int, mix: str, rng: random.Random) -> list[str]:
+    """
+    Pick the color values of a synthetic frontmatter.
+
+    Args:
+        colors: Number of colors
+        mix: "hex" for hex colors only, "named" for palette colors only,
+            "mixed" for alternating hex and palette colors
+        rng: Random number generator
+    Returns:
+        The color values, as written in the frontmatter
+    """
+    names = rng.sample(sorted(palette.PALETTES[NAMED_PALETTE].keys()), colors)
+    values: list[str] = []
+    for index, name in enumerate(names):
+        if mix == "named" or (mix == "mixed" and index % 2):
+            values.append(f"{NAMED_PALETTE}:{name}")
+        else:
+            values.append(f"#{rng.getrandbits(32):08X}")
+    return values
+
+
+def grid_text(size: int, colors: int, rng: random.Random) -> str:
+    """
+    Generate a square CSV pixel grid of random color keys.
+
+    Args:
+        size: Number of rows and columns
+        colors: Number of color keys
+        rng: Random number generator
+    Returns:
+        The pixel grid, one line per row
+    """
+    keys = [str(key) for key in range(colors)]
+    return "".join(
+        ",".join(rng.choices(keys, k=size)) + "\n" for _ in range(size)
+    )
+
+
+def write_markdown(path: Path, values: list[str], grid: str) -> dict[str, str]:
+    """
+    Write a synthetic markdown file.
+
+    Args:
+        path: Path to the markdown file
+        values: Color values of the frontmatter, keyed by their index
+        grid: The pixel grid
+    Returns:
+        Mapping of color keys to color values
+    """
+    frontmatter = {str(key): value for key, value in enumerate(values)}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("+++\n")
+        for key, value in frontmatter.items():
+            f.write(f'"{key}" = "{value}"\n')
+        f.write("+++\n")
+        f.write(grid)
+    return frontmatter
+
+
+def measure(run: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """
+    Measure the best wall time and the peak memory of a function.
+
+    Args:
+        run: Function to measure
+        repeat: Maximum number of timed runs, stopping early once the
+            runs took more than a second in total
+    Returns:
+        Tuple of (seconds, peak_memory)
+        - seconds: the best wall time in seconds
+        - peak_memory: the peak memory allocated through Python, in bytes
+    """
+    times: list[float] = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+            if sum(times) > 1:
+                break
+
+        tracemalloc.start()
+        try:
+            run()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return min(times), peak_memory
+
+
+def benchmark_case(
+    directory: Path,
+    size: int,
+    colors: int,
+    mix: str,
+    grid: str,
+    repeat: int,
+    rng: random.Random,
+) -> list[dict[str, Any]]:
+    """
+    Benchmark every stage on one synthetic markdown file.
+
+    Args:
+        directory: Directory for the markdown file and the image
+        size: Number of rows and columns of the grid
+        colors: Number of colors
+        mix: Palette mix, see color_values
+        grid: The pixel grid
+        repeat: Maximum number of timed runs of each stage
+        rng: Random number generator
+    Returns:
+        One result per stage
+    """
+    markdown_file = directory / f"grid-{size}-{colors}-{mix}.md"
+    frontmatter = write_markdown(
+        markdown_file, color_values(colors, mix, rng), grid
+    )
+    output_path = markdown_file.with_suffix(".png")
+    parser = PixelArtParser()
+    generator = ImageGenerator()
+
+    def parse() -> object:
+        palette.resolve.cache_clear()
+        palette.decode.cache_clear()
+        return parser.parse(markdown_file, compact=True)
+
+    def resolve() -> object:
+        palette.resolve.cache_clear()
+        palette.decode.cache_clear()
+        return [palette.resolve_color(value) for value in frontmatter.values()]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        color_dict, pixel_grid = parser.parse(markdown_file, compact=True)
+        image = generator.generate(color_dict, pixel_grid, 1)
+
+    stages: list[tuple[str, Callable[[], object], int, str]] = [
+        ("parse", parse, size * size, "cells/s"),
+        ("resolve", resolve, colors, "colors/s"),
+        (
+            "render",
+            lambda: generator.generate(color_dict, pixel_grid, 1),
+            size * size,
+            "cells/s",
+        ),
+        (
+            "save",
+            lambda: image.save(output_path, "PNG"),
+            size * size,
+            "cells/s",
+        ),
+    ]
+
+    results: list[dict[str, Any]] = []
+    for stage, run, items, unit in stages:
+        seconds, peak_memory = measure(run, repeat)
+        results.append(
+            {
+                "size": size,
+                "colors": colors,
+                "mix": mix,
+                "stage": stage,
+                "seconds": seconds,
+                "throughput": items / seconds,
+                "unit": unit,
+                "peak_memory": peak_memory,
+            }
+        )
+    markdown_file.unlink()
+    output_path.unlink()
+    return results
+
+
+def current_commit() -> str:
+    """
+    Get the short hash of the current commit.
+
+    Returns:
+        The short commit hash, or "unknown" outside of a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def result_key(result: dict[str, Any]) -> tuple[int, int, str, str]:
+    """Key matching the results of the same case and stage."""
+    return (result["size"], result["colors"], result["mix"], result["stage"])
+
+
+def print_results(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]]
+) -> None:
+    """
+    Print a table of results, with the speedup over a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Results of a previous run, possibly empty
+    """
+    previous = {result_key(result): result for result in baseline}
+    print(
+        f"{'size':>6}{'colors':>8}{'mix':>7}{'stage':>9}"
+        f"{'time':>12}{'throughput':>20}{'peak':>11}"
+        + (f"{'speedup':>9}" if previous else "")
+    )
+    for result in results:
+        line = (
+            f"{result['size']:>6}{result['colors']:>8}{result['mix']:>7}"
+            f"{result['stage']:>9}{result['seconds'] * 1e3:>10.2f}ms"
+            f"{result['throughput']:>12.3g} {result['unit']:<8}"
+            f"{result['peak_memory'] / 2**20:>8.1f}MiB"
+        )
+        if (before := previous.get(result_key(result))) is not None:
+            line += f"{before['seconds'] / result['seconds']:>8.2f}x"
+        print(line)
+
+
+def int_list(value: str) -> list[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(item) for item in value.split(",")]
+
+
+def str_list(value: str) -> list[str]:
+    """Parse a comma-separated list of strings."""
+    return value.split(",")
+
+
+def main() -> None:
+    """Run the benchmarks, print and save their results."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", type=int_list, default=list(SIZES))
+    parser.add_argument("--colors", type=int_list, default=list(COLORS))
+    parser.add_argument("--mixes", type=str_list, default=list(MIXES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="JSON results file (default: results/<commit>.json)",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="JSON results file of a previous run to compare with",
+    )
+    args = parser.parse_args()
+    if unknown := set(args.mixes) - set(MIXES):
+        parser.error(f"unknown mixes: {', '.join(sorted(unknown))}")
+
+    baseline: list[dict[str, Any]] = []
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())["results"]
+
+    # Load the palette up front, so that it is not part of any stage
+    palette.PALETTES[NAMED_PALETTE]
+
+    rng = random.Random(args.seed)
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for colors in args.colors:
+                grid = grid_text(size, colors, rng)
+                for mix in args.mixes:
+                    results += benchmark_case(
+                        Path(directory),
+                        size,
+                        colors,
+                        mix,
+                        grid,
+                        args.repeat,
+                        rng,
+                    )
+    print_results(results, baseline)
+
+    commit = current_commit()
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "date": datetime.now(UTC).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "platform": platform.platform(),
+                "results": results,
+            },
+            indent=1,
+        )
+    )
+    print(f"\nResults saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
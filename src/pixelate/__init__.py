@@ -2,12 +2,50 @@
 Pixelate - A pixel art generator from markdown files with TOML frontmatter.
 """
 
-from typing import Final
+from typing import TYPE_CHECKING, Any
 
-from importlib import metadata
+from .errors import (
+    ColorError,
+    FrontmatterError,
+    GridError,
+    OutputFormatError,
+    PixelateError,
+)
 
-from .app import PixelateApp
+if TYPE_CHECKING:
+    from .aio import AsyncPixelator
+    from .api import render
+    from .app import PixelateApp
 
-__version__: Final[str] = metadata.version("pixelate")
+__all__ = [
+    "AsyncPixelator",
+    "ColorError",
+    "FrontmatterError",
+    "GridError",
+    "OutputFormatError",
+    "PixelateApp",
+    "PixelateError",
+    "render",
+]
 
-__all__ = ["PixelateApp"]
+
+def __getattr__(name: str) -> Any:
+    # The application and the renderers, which load Pillow and the
+    # palettes, and the package metadata are only imported when first used,
+    # so that importing a light module such as pixelate.cli or
+    # pixelate.client stays fast
+    value: Any
+    if name == "PixelateApp":
+        from .app import PixelateApp as value
+    elif name == "render":
+        from .api import render as value
+    elif name == "AsyncPixelator":
+        from .aio import AsyncPixelator as value
+    elif name == "__version__":
+        from importlib import metadata
+
+        value = metadata.version("pixelate")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -0,0 +1,179 @@
+"""
+Renders markdown content from asyncio services, off the event loop.
+"""
+
+import asyncio
+import os
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Mapping,
+    Sequence,
+)
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+
+from pixelate.api import Source, render
+
+
+class RenderResult(NamedTuple):
+    """The outcome of rendering one source of a batch."""
+
+    position: int
+    source: Source | Path
+    data: bytes | None
+    error: Exception | None
+
+
+class AsyncPixelator:
+    """
+    Renders markdown content without blocking the event loop.
+
+    Files are read in the default thread pool of the loop, and parsing,
+    drawing and encoding run in an executor: a thread pool by default, or
+    a ProcessPoolExecutor to render on several cores. At most
+    ``concurrency`` renders are in flight at once, across every caller.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        concurrency: int | None = None,
+    ) -> None:
+        """
+        Initialize the async pixelator.
+
+        Args:
+            executor: Executor running the renders (default: the default
+                thread pool of the event loop)
+            concurrency: Maximum number of renders in flight (default:
+                CPU count)
+        """
+        self._executor = executor
+        self._concurrency = concurrency or os.cpu_count() or 1
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+
+    async def render(
+        self,
+        source: Source | Path,
+        pixel_size: int | Sequence[int] = 10,
+        format: str = "png",
+        colors: Mapping[str, str] | None = None,
+        indexed: bool = False,
+    ) -> bytes:
+        """
+        Render markdown content, a markdown file or a pixel grid.
+
+        Args:
+            source: A source of pixelate.render, or a path to a markdown
+                file
+            pixel_size: Size, or sizes, of each pixel in the image
+            format: Image format (e.g., "png", "ico")
+            colors: Colors of a pixel grid, see pixelate.render
+            indexed: Whether to render a palette-indexed image, see
+                pixelate.render
+        Returns:
+            The content of the image file
+        Raises:
+            PixelateError: If the content is invalid, see pixelate.render
+            OSError: If the markdown file cannot be read
+        """
+        if isinstance(source, Path):
+            source = await asyncio.to_thread(source.read_bytes)
+
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                self._executor,
+                partial(render, source, pixel_size, format, colors, indexed),
+            )
+
+    async def render_many(
+        self,
+        sources: Iterable[Source | Path] | AsyncIterable[Source | Path],
+        pixel_size: int | Sequence[int] = 10,
+        format: str = "png",
+        colors: Mapping[str, str] | None = None,
+        indexed: bool = False,
+    ) -> AsyncIterator[RenderResult]:
+        """
+        Render several sources, yielding each result as it completes.
+
+        Sources are only taken from ``sources`` while fewer than
+        ``concurrency`` renders are in flight, and no more are started
+        while a result waits to be consumed, so that a slow consumer or a
+        huge batch does not pile up pending work.
+
+        Args:
+            sources: Sources of render, possibly produced asynchronously
+            pixel_size: Size, or sizes, of each pixel in the images
+            format: Image format (e.g., "png", "ico")
+            colors: Colors of pixel grids, see pixelate.render
+            indexed: Whether to render palette-indexed images, see
+                pixelate.render
+        Yields:
+            The result of each source, with its position in ``sources``,
+            in completion order; invalid
+            sources and unreadable files give their error instead of data
+        """
+        iterator = _aiter(sources)
+        pending: dict[asyncio.Task[bytes], tuple[int, Source | Path]] = {}
+        position = 0
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self._concurrency:
+                    try:
+                        source = await anext(iterator)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.create_task(
+                        self.render(
+                            source, pixel_size, format, colors, indexed
+                        )
+                    )
+                    pending[task] = (position, source)
+                    position += 1
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task_position, source = pending.pop(task)
+                    if (error := task.exception()) is not None:
+                        if not isinstance(error, Exception):
+                            raise error
+                        yield RenderResult(task_position, source, None, error)
+                    else:
+                        yield RenderResult(
+                            task_position, source, task.result(), None
+                        )
+        finally:
+            # The consumer stopped early, or the loop is shutting down
+            for task in pending:
+                task.cancel()
+
+
+async def _aiter(
+    sources: Iterable[Source | Path] | AsyncIterable[Source | Path],
+) -> AsyncIterator[Source | Path]:
+    """
+    Iterate over sources, whether produced synchronously or not.
+
+    Args:
+        sources: Iterable or async iterable of sources
+    Yields:
+        Each source
+    """
+    if isinstance(sources, AsyncIterable):
+        async for source in sources:
+            yield source
+    else:
+        for source in sources:
+            yield source
@@ -0,0 +1,156 @@
+"""
+Renders markdown content, or pixel grids, in memory without any file.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import overload
+
+from PIL import Image
+
+from pixelate import palette
+from pixelate.errors import ColorError, GridError, PixelateError
+from pixelate.generator import ImageGenerator
+from pixelate.grid import PixelGrid
+from pixelate.parser import PixelArtParser
+from pixelate.pixelator import encode
+
+# Markdown content, as text or UTF-8 bytes, or a pixel grid of color keys
+Source = (
+    str | bytes | bytearray | memoryview | PixelGrid | Sequence[Sequence[str]]
+)
+
+# Neither the parser nor the generator keep any state between renders
+_parser = PixelArtParser()
+_generator = ImageGenerator()
+
+
+@overload
+def render(
+    source: Source,
+    pixel_size: int | Sequence[int] = ...,
+    format: str = ...,
+    colors: Mapping[str, str] | None = ...,
+    indexed: bool = ...,
+) -> bytes: ...
+
+
+@overload
+def render(
+    source: Source,
+    pixel_size: int | Sequence[int],
+    format: None,
+    colors: Mapping[str, str] | None = ...,
+    indexed: bool = ...,
+) -> Image.Image: ...
+
+
+def render(
+    source: Source,
+    pixel_size: int | Sequence[int] = 10,
+    format: str | None = "png",
+    colors: Mapping[str, str] | None = None,
+    indexed: bool = False,
+) -> bytes | Image.Image:
+    """
+    Render markdown content, or a pixel grid, into an image.
+
+    Args:
+        source: Content of a markdown file, as text or UTF-8 bytes, or a
+            pixel grid (rows of color keys, or a PixelGrid)
+        pixel_size: Size, or sizes, of each pixel in the image
+        format: Image format of the returned bytes (e.g., "png", "ico"),
+            or None to return the image itself
+        colors: Mapping of the color keys of a pixel grid to color
+            values (e.g., "#FF0000", "css4:coral"), required for grids
+        indexed: Whether to render a palette-indexed image, see
+            ImageGenerator.generate_sizes
+    Returns:
+        The content of the image file, or the image if format is None
+    Raises:
+        PixelateError: If the markdown content is invalid (see
+            FrontmatterError, ColorError and GridError), a pixel size is
+            below 1, or the format is unknown or cannot hold the images
+            (OutputFormatError)
+        TypeError: If a pixel grid is given without its colors
+    """
+    pixel_sizes = (
+        [pixel_size] if isinstance(pixel_size, int) else list(pixel_size)
+    )
+    if format is None and len(pixel_sizes) != 1:
+        raise TypeError("Several pixel sizes require an image format")
+    if any(size < 1 for size in pixel_sizes):
+        raise PixelateError(f"Pixel sizes must be at least 1: {pixel_sizes}")
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        try:
+            source = str(source, "utf-8")
+        except UnicodeDecodeError as e:
+            raise PixelateError(f"Markdown content is not UTF-8: {e}")
+
+    color_dict: dict[str, str]
+    pixel_grid: list[list[str]] | PixelGrid
+    if isinstance(source, str):
+        color_dict, pixel_grid = _parser.parse_text(source, compact=True)
+    elif colors is None:
+        raise TypeError("The colors of a pixel grid are required")
+    else:
+        color_dict = _resolve_colors(colors)
+        pixel_grid = _compact_grid(source, color_dict)
+
+    images = _generator.generate_sizes(
+        color_dict, pixel_grid, pixel_sizes, indexed
+    )
+    if format is None:
+        return images[0]
+    return encode(images, format)
+
+
+def _resolve_colors(colors: Mapping[str, str]) -> dict[str, str]:
+    """
+    Resolve the colors of a pixel grid to hex color codes.
+
+    Args:
+        colors: Mapping of color keys to color values
+    Returns:
+        Mapping of color keys to hex color codes
+    Raises:
+        ColorError: If a color value is invalid
+    """
+    color_dict: dict[str, str] = {}
+    for key, color_value in colors.items():
+        try:
+            color_dict[key] = palette.resolve_color(color_value)
+        except ValueError as e:
+            raise ColorError(
+                f"{e}, color definition '{key}' = '{color_value}' is invalid"
+            )
+    return color_dict
+
+
+def _compact_grid(
+    pixel_grid: PixelGrid | Sequence[Sequence[str]],
+    color_dict: Mapping[str, str],
+) -> PixelGrid:
+    """
+    Check a pixel grid, as the parser checks the grid of markdown content.
+
+    Args:
+        pixel_grid: Rows of color keys, or a PixelGrid
+        color_dict: Mapping of color keys to hex color codes
+    Returns:
+        The pixel grid as a PixelGrid
+    Raises:
+        GridError: If the grid is empty, its rows do not have the same
+            number of columns, or it uses undefined color keys
+    """
+    if not isinstance(pixel_grid, PixelGrid):
+        pixel_grid = PixelGrid.from_rows(pixel_grid, color_dict)
+    if not pixel_grid.width:
+        raise GridError("Pixel grid is empty")
+
+    used_keys = {pixel_grid.keys[code] for code in set(pixel_grid.codes)}
+    if undefined_keys := used_keys - color_dict.keys():
+        raise GridError(
+            f"Undefined color keys in pixel grid: {undefined_keys}"
+        )
+    return pixel_grid
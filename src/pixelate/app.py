@@ -2,58 +2,415 @@
 Main application class for the Pixelate CLI tool.
 """
 
+import logging
+import os
+import signal
 import sys
+from collections.abc import Iterable, Sequence
 from pathlib import Path
+from types import FrameType
 
-from pixelate.pixelator import Pixelator
+from pixelate.atlas import index_path, write_atlas
+from pixelate.cache import BuildCache, RenderCache
+from pixelate.client import default_socket_path, is_trusted, send
+from pixelate.discovery import iter_markdown_files
+from pixelate.metrics import Metrics
+from pixelate.pixelator import Pixelator, mirrored_output_dir
+from pixelate.server import RenderServer
+from pixelate.watcher import Watcher
+
+logger = logging.getLogger(__name__)
+
+
+def _interrupt(signum: int, frame: FrameType | None) -> None:
+    """Handle a signal as an interruption with Ctrl+C."""
+    raise KeyboardInterrupt
 
 
 class PixelateApp:
     """Main application class for the Pixelate CLI tool."""
 
-    def __init__(self) -> None:
-        self._pixelator = Pixelator()
+    def __init__(
+        self,
+        stream: bool = False,
+        metrics: Metrics | None = None,
+        render_cache_dir: str | None = None,
+    ) -> None:
+        """
+        Initialize the application.
+
+        Args:
+            stream: Whether to read pixel grids one row at a time
+            metrics: Optional metrics recording the stages of each file
+            render_cache_dir: Optional directory keeping encoded images
+                across runs, reused by identical renders
+        """
+        self._pixelator = Pixelator(
+            stream,
+            metrics,
+            RenderCache(Path(render_cache_dir) if render_cache_dir else None),
+        )
 
-    def run(self, input_path_name: str, pixel_size: int, format: str) -> None:
+    def run(
+        self,
+        input_path_name: str,
+        pixel_size: int | Sequence[int],
+        format: str | Sequence[str],
+        jobs: int | None = None,
+        force: bool = False,
+        cache_dir: str | None = None,
+        atlas: str | None = None,
+        recursive: bool = False,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        output_dir: str | None = None,
+        indexed: bool = False,
+    ) -> None:
         """
         Run the pixelate application.
 
         Args:
             input_path_name: Path to a file or folder to process
-            pixel_size: Size of each pixel in the output image
-            format: Output image format
+            pixel_size: Size, or sizes, of each pixel in the output images
+            format: Output image format, or formats
+            jobs: Number of processes for folders (default: CPU count)
+            force: Whether to render files whose output is up to date
+            cache_dir: Directory of the build manifest (default: next to
+                the outputs)
+            atlas: Optional path to an atlas image packing every image,
+                written instead of one image per file
+            recursive: Whether to process the subfolders of folders too
+            include: Glob patterns of the files of folders to process
+                (default: every markdown file)
+            exclude: Glob patterns of the files and subfolders of folders
+                to leave out
+            output_dir: Directory of the output images, mirroring the
+                subfolders of folders (default: next to each file)
+            indexed: Whether to write palette-indexed images, with the
+                smallest bit depth holding their colors
         """
         input_path = Path(input_path_name)
+        output_root = Path(output_dir) if output_dir else None
 
         # Validate input file/folder path exists
         if not input_path.exists():
-            print(f"Error: Path '{input_path_name}' does not exist")
+            logger.error("Path '%s' does not exist", input_path_name)
             sys.exit(1)
 
+        # Pack every image into an atlas
+        if atlas is not None:
+            self._atlas(
+                input_path,
+                pixel_size,
+                Path(atlas),
+                recursive,
+                include,
+                exclude,
+            )
+
         # Process single markdown file
-        if input_path.is_file() and input_path.suffix.lower() == ".md":
-            self._pixelator.process(input_path, None, pixel_size, format)
+        elif input_path.is_file() and input_path.suffix.lower() == ".md":
+            cache = self._cache(input_path, cache_dir, output_root)
+            self._pixelator.process(
+                input_path,
+                output_root,
+                pixel_size,
+                format,
+                cache,
+                force,
+                indexed,
+            )
+            cache.save()
 
         # Process all markdown files in folder
         elif input_path.is_dir():
-            # Find all markdown files
-            files = list(input_path.glob("*.md"))
+            files: Iterable[Path] = iter_markdown_files(
+                input_path, recursive, include, exclude
+            )
+            if recursive:
+                # Render files while the rest of the tree is walked
+                logger.info(
+                    "Processing markdown files of '%s' and its subfolders\n",
+                    input_path,
+                )
+            else:
+                files = list(files)
+                if files:
+                    logger.info(
+                        "Found %d markdown file(s) to process\n", len(files)
+                    )
 
-            if not files:
-                print(
-                    f"Error: No markdown files found in folder '{input_path}'"
+            cache = self._cache(input_path, cache_dir, output_root)
+            render_cache = self._pixelator.render_cache
+            hits, misses = render_cache.hits, render_cache.misses
+            results = self._pixelator.process_many(
+                files,
+                output_root,
+                pixel_size,
+                format,
+                jobs,
+                cache,
+                force,
+                input_path,
+                indexed,
+            )
+            if not results:
+                logger.error(
+                    "No markdown files found in folder '%s'", input_path
                 )
                 sys.exit(1)
+            cache.save()
 
-            print(f"Found {len(files)} markdown file(s) to process\n")
-
-            for path in files:
-                self._pixelator.process(path, input_path, pixel_size, format)
+            hits, misses = (
+                render_cache.hits - hits,
+                render_cache.misses - misses,
+            )
+            if hits or misses:
+                logger.info(
+                    "\nRender cache: %d hit(s), %d miss(es)", hits, misses
+                )
 
         # Invalid input path
         else:
-            print(
-                f"Error: Path '{input_path_name}' is "
-                f"neither a markdown file nor a directory"
+            logger.error(
+                "Path '%s' is neither a markdown file nor a directory",
+                input_path_name,
             )
             sys.exit(1)
+
+    def watch(
+        self,
+        input_path_name: str,
+        pixel_size: int | Sequence[int],
+        format: str | Sequence[str],
+        jobs: int | None = None,
+        force: bool = False,
+        cache_dir: str | None = None,
+        atlas: str | None = None,
+        recursive: bool = False,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        output_dir: str | None = None,
+        indexed: bool = False,
+    ) -> None:
+        """
+        Run the pixelate application, then re-render files as they change.
+
+        The same Pixelator, with its loaded palettes and caches, renders
+        every change until interrupted with Ctrl+C.
+
+        Args:
+            input_path_name: Path to a file or folder to process
+            pixel_size: Size, or sizes, of each pixel in the output images
+            format: Output image format, or formats
+            jobs: Number of processes for the first run of folders
+            force: Whether to render files whose output is up to date
+            cache_dir: Directory of the build manifest (default: next to
+                the outputs)
+            atlas: Optional path to an atlas image, packed again from
+                every file on each change
+            recursive: Whether to watch the subfolders of folders too
+            include: Glob patterns of the files of folders to watch
+                (default: every markdown file)
+            exclude: Glob patterns of the files and subfolders of folders
+                to leave out
+            output_dir: Directory of the output images, mirroring the
+                subfolders of folders (default: next to each file)
+            indexed: Whether to write palette-indexed images, with the
+                smallest bit depth holding their colors
+        """
+        input_path = Path(input_path_name)
+        # Watched from before the first run, so that the files saved
+        # while it renders are rendered again
+        watcher = Watcher(
+            input_path, recursive=recursive, include=include, exclude=exclude
+        )
+        self.run(
+            input_path_name,
+            pixel_size,
+            format,
+            jobs,
+            force,
+            cache_dir,
+            atlas,
+            recursive,
+            include,
+            exclude,
+            output_dir,
+            indexed,
+        )
+
+        output_root = Path(output_dir) if output_dir else None
+        source_root = input_path if input_path.is_dir() else None
+        cache = self._cache(input_path, cache_dir, output_root)
+
+        logger.info(
+            "\nWatching '%s' for changes (press Ctrl+C to stop)", input_path
+        )
+        try:
+            for markdown_files in watcher.changes():
+                if atlas is not None:
+                    self._atlas(
+                        input_path,
+                        pixel_size,
+                        Path(atlas),
+                        recursive,
+                        include,
+                        exclude,
+                    )
+                    continue
+                for markdown_file in markdown_files:
+                    self._pixelator.process(
+                        markdown_file,
+                        mirrored_output_dir(
+                            markdown_file, output_root, source_root
+                        ),
+                        pixel_size,
+                        format,
+                        cache,
+                        indexed=indexed,
+                    )
+                cache.save()
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+    def serve(self, socket_path_name: str | None = None) -> None:
+        """
+        Serve render requests until interrupted with Ctrl+C.
+
+        Clients, such as the command line when a server is running, are
+        handled by this application and its warm Pixelator, one at a time.
+
+        Args:
+            socket_path_name: Path of the server socket (default:
+                client.default_socket_path())
+        """
+        socket_path = (
+            Path(socket_path_name)
+            if socket_path_name
+            else default_socket_path()
+        )
+        # The default socket may be in a private folder of its own
+        socket_dir = socket_path.parent
+        socket_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if socket_dir.stat().st_uid != os.getuid():
+            logger.error(
+                "Folder '%s' of the socket belongs to another user, "
+                "choose another path with --socket",
+                socket_dir,
+            )
+            sys.exit(1)
+
+        if socket_path.exists() or socket_path.is_symlink():
+            if not is_trusted(socket_path):
+                logger.error(
+                    "'%s' exists and is not a socket of the current user",
+                    socket_path,
+                )
+                sys.exit(1)
+            if send({"command": "ping"}, socket_path) is not None:
+                logger.error(
+                    "A server is already listening on '%s'", socket_path
+                )
+                sys.exit(1)
+            # Left by a server that did not stop cleanly
+            socket_path.unlink()
+
+        server = RenderServer(socket_path, self)
+        # Stop as on Ctrl+C when terminated, removing the socket
+        signal.signal(signal.SIGTERM, _interrupt)
+        logger.info("Serving on '%s' (press Ctrl+C to stop)", socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopped serving")
+        finally:
+            server.server_close()
+            socket_path.unlink(missing_ok=True)
+
+    def _atlas(
+        self,
+        input_path: Path,
+        pixel_size: int | Sequence[int],
+        atlas_path: Path,
+        recursive: bool = False,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+    ) -> None:
+        """
+        Render every markdown file of a file or folder into an atlas.
+
+        Images are named after their file, relative to the folder and
+        without suffix (e.g. "enemies/bat"). Files that cannot be rendered
+        are reported and left out.
+
+        Args:
+            input_path: Path to a file or folder to process
+            pixel_size: Size of each pixel in the images, a single size
+            atlas_path: Path to the atlas image
+            recursive: Whether to pack the subfolders of folders too
+            include: Glob patterns of the files of folders to pack
+            exclude: Glob patterns of the files and subfolders of folders
+                to leave out
+        """
+        pixel_sizes = (
+            [pixel_size] if isinstance(pixel_size, int) else list(pixel_size)
+        )
+        if len(pixel_sizes) != 1:
+            logger.error("An atlas requires a single pixel size")
+            sys.exit(1)
+
+        if input_path.is_dir():
+            files = iter_markdown_files(
+                input_path, recursive, include, exclude
+            )
+            root = input_path
+        else:
+            files = iter([input_path])
+            root = input_path.parent
+        images = {}
+        for markdown_file in files:
+            image = self._pixelator.render(markdown_file, pixel_sizes[0])
+            if image is not None:
+                name = markdown_file.relative_to(root).with_suffix("")
+                images[name.as_posix()] = image
+
+        if not images:
+            logger.error("No images to pack into atlas '%s'", atlas_path)
+            sys.exit(1)
+
+        try:
+            write_atlas(atlas_path, images, pixel_sizes[0])
+        except ValueError as e:
+            # Including the OutputFormatError of a format without alpha
+            logger.error("Failed to write atlas '%s': %s", atlas_path, e)
+            sys.exit(1)
+        logger.info(
+            "Atlas of %d image(s) saved to: %s (index: %s)",
+            len(images),
+            atlas_path,
+            index_path(atlas_path),
+        )
+
+    @staticmethod
+    def _cache(
+        input_path: Path, cache_dir: str | None, output_dir: Path | None
+    ) -> BuildCache:
+        """
+        Open the build cache of a file or folder.
+
+        Args:
+            input_path: Path to a file or folder to process
+            cache_dir: Directory of the build manifest (default: next to
+                the outputs)
+            output_dir: Optional directory of the output images
+        Returns:
+            The build cache
+        """
+        if cache_dir:
+            return BuildCache.in_directory(Path(cache_dir))
+        if output_dir is not None:
+            return BuildCache.in_directory(output_dir)
+        if input_path.is_dir():
+            return BuildCache.in_directory(input_path)
+        return BuildCache.in_directory(input_path.parent)
@@ -0,0 +1,146 @@
+"""
+Handles packing rendered images into a texture atlas.
+"""
+
+import json
+import math
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+from PIL import Image
+
+from pixelate.pixelator import encode
+from pixelate.utility.files import write_if_changed
+
+# Background of the atlas, around and between the packed images
+BACKGROUND: tuple[int, int, int, int] = (0, 0, 0, 0)
+
+
+class Rect(NamedTuple):
+    """The rectangle of an image in an atlas."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def pack_shelves(
+    sizes: Sequence[tuple[int, int]],
+) -> tuple[list[Rect], tuple[int, int]]:
+    """
+    Pack rectangles into shelves of a roughly square area.
+
+    Rectangles are placed from the tallest to the shortest, left to right
+    on shelves as wide as the square root of their total area (or as the
+    widest rectangle), each shelf starting below the previous one.
+
+    Args:
+        sizes: The (width, height) of each rectangle
+    Returns:
+        Tuple of (rects, size)
+        - rects: the rectangle of each size, in order
+        - size: the (width, height) of the packed area
+    """
+    if not sizes:
+        return [], (0, 0)
+
+    area = sum(width * height for width, height in sizes)
+    shelf_width = max(
+        max(width for width, _ in sizes), math.isqrt(area - 1) + 1
+    )
+
+    rects: list[Rect] = [Rect(0, 0, 0, 0)] * len(sizes)
+    x = y = shelf_height = 0
+    for index in sorted(
+        range(len(sizes)),
+        key=lambda index: (sizes[index][1], sizes[index][0]),
+        reverse=True,
+    ):
+        width, height = sizes[index]
+        if x + width > shelf_width:
+            # Start a new shelf below the current one
+            x, y, shelf_height = 0, y + shelf_height, 0
+        rects[index] = Rect(x, y, width, height)
+        x += width
+        shelf_height = max(shelf_height, height)
+
+    return rects, (
+        max(rect.x + rect.width for rect in rects),
+        y + shelf_height,
+    )
+
+
+def build_atlas(
+    images: Mapping[str, Image.Image],
+) -> tuple[Image.Image, dict[str, Rect]]:
+    """
+    Pack images into a single atlas image.
+
+    Args:
+        images: Mapping of names to the images to pack
+    Returns:
+        Tuple of (atlas, rects)
+        - atlas: the atlas image
+        - rects: mapping of names to the rectangle of their image
+    """
+    names = list(images)
+    rect_list, size = pack_shelves([images[name].size for name in names])
+    atlas = Image.new("RGBA", size, BACKGROUND)
+    for name, rect in zip(names, rect_list):
+        atlas.paste(images[name], (rect.x, rect.y))
+    return atlas, dict(zip(names, rect_list))
+
+
+def index_path(atlas_path: Path) -> Path:
+    """
+    Get the path of the JSON index of an atlas.
+
+    Args:
+        atlas_path: Path to the atlas image
+    Returns:
+        The atlas path with a ".json" suffix
+    """
+    return atlas_path.with_suffix(".json")
+
+
+def write_atlas(
+    atlas_path: Path, images: Mapping[str, Image.Image], pixel_size: int
+) -> dict[str, Rect]:
+    """
+    Pack images into an atlas, and save it along with its JSON index.
+
+    The index maps each name to the rectangle of its image, e.g.
+    ``{"bird": {"x": 0, "y": 0, "width": 160, "height": 160}}``. Both
+    files are replaced atomically, and left untouched if unchanged.
+
+    Args:
+        atlas_path: Path to the atlas image, whose suffix sets its format
+        images: Mapping of names to the images to pack
+        pixel_size: Size of each pixel in the images, recorded in the index
+    Returns:
+        Mapping of names to the rectangle of their image
+    Raises:
+        ValueError: If the suffix of the atlas path is not an image format
+        OutputFormatError: If the format cannot store the atlas, e.g.
+            JPEG without transparency
+    """
+    format = Image.registered_extensions().get(atlas_path.suffix.lower())
+    if format is None:
+        raise ValueError(f"Unknown image extension: '{atlas_path.suffix}'")
+
+    atlas, rects = build_atlas(images)
+    write_if_changed(atlas_path, encode([atlas], format))
+
+    index = {
+        "image": atlas_path.name,
+        "width": atlas.width,
+        "height": atlas.height,
+        "pixel_size": pixel_size,
+        "sprites": {name: rect._asdict() for name, rect in rects.items()},
+    }
+    write_if_changed(
+        index_path(atlas_path), json.dumps(index, indent=1).encode("utf-8")
+    )
+    return rects
@@ -0,0 +1,381 @@
+"""
+Handles the build manifest used to skip up-to-date outputs, and the cache
+of encoded images shared by identical renders.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from importlib import metadata
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from pixelate.grid import PixelGrid
+from pixelate.utility.files import write_if_changed
+
+
+class Fingerprint(NamedTuple):
+    """The state of a source file, as recorded in the build manifest."""
+
+    sha256: str  # Hex SHA-256 digest of the content
+    size: int
+    mtime_ns: int
+
+
+class BuildCache:
+    """
+    On-disk manifest of rendered markdown files.
+
+    Each entry records the content hash of a source markdown file together
+    with the settings and package version used to render it. An output is
+    current when the source, the settings and the version are unchanged
+    and the output file still exists. The size and modification time of
+    the source are stored as well, so unchanged files are recognized
+    without being read.
+    """
+
+    FILENAME = ".pixelate-cache.json"
+
+    def __init__(self, manifest_path: Path) -> None:
+        self._manifest_path = manifest_path
+        self._version = metadata.version("pixelate")
+        self._entries: dict[str, dict[str, Any]] = self._load()
+        self._modified = False
+
+    @classmethod
+    def in_directory(cls, directory: Path) -> "BuildCache":
+        """
+        Create a build cache whose manifest is stored in a directory.
+
+        Args:
+            directory: Directory holding the manifest file
+        Returns:
+            The build cache
+        """
+        return cls(directory / cls.FILENAME)
+
+    @property
+    def manifest_path(self) -> Path:
+        """Return the path of the manifest file."""
+        return self._manifest_path
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """
+        Load the manifest entries from disk.
+
+        Returns:
+            The manifest entries, empty if the manifest is missing or
+            cannot be read
+        """
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or not isinstance(
+            entries := manifest.get("entries"), dict
+        ):
+            return {}
+        return entries
+
+    @classmethod
+    def fingerprint(cls, source_file: Path) -> Fingerprint | None:
+        """
+        Take the state of a source file, before it is rendered.
+
+        The state is recorded once the file is rendered, see record, so
+        that an edit made while rendering is not taken for the rendered
+        content.
+
+        Args:
+            source_file: Path to the source file
+        Returns:
+            The state of the file, or None if it cannot be read
+        """
+        try:
+            # Taken before the digest, so an edit while hashing is stale
+            stat = source_file.stat()
+            digest = cls._digest(source_file)
+        except OSError:
+            return None
+        return Fingerprint(digest, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _digest(source_file: Path) -> str:
+        """
+        Compute the content hash of a source file.
+
+        Args:
+            source_file: Path to the source file
+        Returns:
+            The hex SHA-256 digest of the file content
+        """
+        with open(source_file, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    def _settings(
+        self,
+        output_paths: Sequence[Path],
+        pixel_sizes: Sequence[int],
+        formats: Sequence[str],
+        indexed: bool,
+    ) -> dict[str, Any]:
+        """
+        Collect the settings the outputs depend on, besides their source.
+
+        Args:
+            output_paths: Paths to the output images
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats
+            indexed: Whether the output images are palette-indexed
+        Returns:
+            The settings as a dictionary
+        """
+        return {
+            "outputs": [str(path.resolve()) for path in output_paths],
+            "pixel_sizes": list(pixel_sizes),
+            "formats": list(formats),
+            "indexed": indexed,
+            "version": self._version,
+        }
+
+    def is_current(
+        self,
+        source_file: Path,
+        output_paths: Sequence[Path],
+        pixel_sizes: Sequence[int],
+        formats: Sequence[str],
+        indexed: bool = False,
+    ) -> bool:
+        """
+        Check whether the outputs of a source file are up to date.
+
+        Args:
+            source_file: Path to the source markdown file
+            output_paths: Paths to the output images
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats
+            indexed: Whether the output images are palette-indexed
+        Returns:
+            Whether the outputs exist and were rendered from the same
+            source content, settings and package version
+        """
+        entry = self._entries.get(str(source_file.resolve()))
+        if entry is None or not all(path.exists() for path in output_paths):
+            return False
+        if entry["settings"] != self._settings(
+            output_paths, pixel_sizes, formats, indexed
+        ):
+            return False
+
+        try:
+            stat = source_file.stat()
+        except OSError:
+            return False
+        if (entry["size"], entry["mtime_ns"]) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return True
+
+        # The file was touched, compare its content instead
+        if entry["sha256"] != self._digest(source_file):
+            return False
+        entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+        self._modified = True
+        return True
+
+    def record(
+        self,
+        source_file: Path,
+        fingerprint: Fingerprint,
+        output_paths: Sequence[Path],
+        pixel_sizes: Sequence[int],
+        formats: Sequence[str],
+        indexed: bool = False,
+    ) -> None:
+        """
+        Record that a source file has been rendered.
+
+        Args:
+            source_file: Path to the source markdown file
+            fingerprint: State of the source file taken before rendering
+                it, see fingerprint
+            output_paths: Paths to the output images
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats
+            indexed: Whether the output images are palette-indexed
+        """
+        self._entries[str(source_file.resolve())] = {
+            "sha256": fingerprint.sha256,
+            "size": fingerprint.size,
+            "mtime_ns": fingerprint.mtime_ns,
+            "settings": self._settings(
+                output_paths, pixel_sizes, formats, indexed
+            ),
+        }
+        self._modified = True
+
+    def save(self) -> None:
+        """Write the manifest to disk if any entry has changed."""
+        if not self._modified:
+            return
+        self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._manifest_path.with_name(
+            f"{self._manifest_path.name}.{os.getpid()}.tmp"
+        )
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self._entries}, f, indent=1)
+        os.replace(temp_path, self._manifest_path)
+        self._modified = False
+
+
+class RenderCache:
+    """
+    Content-addressed cache of encoded images.
+
+    Renders are keyed by the hex color of each code of their pixel grid,
+    the codes of the grid, the pixel sizes and the format, so that files
+    with different names or color keys, but resolving to the same pixels,
+    share one encoding. Encoded images are kept in a bounded LRU in memory
+    and, optionally, as files in a directory shared across runs and
+    processes.
+    """
+
+    # Default budget of the encoded images kept in memory, in bytes
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self, directory: Path | None = None, max_bytes: int = MAX_BYTES
+    ) -> None:
+        """
+        Initialize the render cache.
+
+        Args:
+            directory: Optional directory storing encoded images on disk
+            max_bytes: Budget of the encoded images kept in memory
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        # Renders may change with the package or Pillow
+        self._version = (
+            f"{metadata.version('pixelate')}/{metadata.version('pillow')}"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> Path | None:
+        """Return the directory storing encoded images, if any."""
+        return self._directory
+
+    def key(
+        self,
+        color_dict: Mapping[str, str],
+        pixel_grid: Iterable[Sequence[str]] | PixelGrid,
+        pixel_sizes: Sequence[int],
+        format: str,
+        indexed: bool = False,
+    ) -> str | None:
+        """
+        Compute the content address of a render.
+
+        Args:
+            color_dict: Mapping of color keys to hex color codes
+            pixel_grid: The pixel grid to render
+            pixel_sizes: Sizes of each pixel in the encoded images
+            format: Image format
+            indexed: Whether the images are palette-indexed
+        Returns:
+            The hex SHA-256 key of the render, or None if the pixel grid
+            is not a PixelGrid (e.g., rows being streamed)
+        """
+        if not isinstance(pixel_grid, PixelGrid):
+            return None
+        header = {
+            "version": self._version,
+            "format": format.lower(),
+            "pixel_sizes": list(pixel_sizes),
+            "indexed": indexed,
+            "size": [pixel_grid.width, pixel_grid.height],
+            "typecode": pixel_grid.codes.typecode,
+            "colors": [color_dict.get(key) for key in pixel_grid.keys],
+        }
+        digest = hashlib.sha256(json.dumps(header).encode("utf-8"))
+        digest.update(pixel_grid.codes)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Look up an encoded image, counting hits and misses.
+
+        Args:
+            key: Key of the render
+        Returns:
+            The encoded image, or None if it is not cached
+        """
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+        elif self._directory is not None:
+            try:
+                data = self._path(self._directory, key).read_bytes()
+            except OSError:
+                pass
+            else:
+                self._remember(key, data)
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store an encoded image.
+
+        Args:
+            key: Key of the render
+            data: The encoded image
+        """
+        self._remember(key, data)
+        if self._directory is not None:
+            path = self._path(self._directory, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_if_changed(path, data)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """
+        Keep an encoded image in memory, evicting the least recent ones.
+
+        Args:
+            key: Key of the render
+            data: The encoded image
+        """
+        if len(data) > self._max_bytes:
+            return
+        if (previous := self._entries.pop(key, None)) is not None:
+            self._size -= len(previous)
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    @staticmethod
+    def _path(directory: Path, key: str) -> Path:
+        """
+        Get the path of an encoded image in the cache directory.
+
+        Args:
+            directory: The cache directory
+            key: Key of the render
+        Returns:
+            The path, in a subdirectory named after the key's first bytes
+        """
+        return directory / key[:2] / key
@@ -3,26 +3,231 @@
 Command line interface for the pixelate package.
 """
 
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 import click
 
-from pixelate.app import PixelateApp
+from pixelate import client
+from pixelate.console import configure_logging
+
+if TYPE_CHECKING:
+    from pixelate.metrics import Metrics
+
+
+def _parse_pixel_sizes(
+    ctx: click.Context, param: click.Parameter, value: str
+) -> tuple[int, ...]:
+    """
+    Parse a comma-separated list of pixel sizes.
+
+    Raises:
+        click.BadParameter: If a size is not a positive integer
+    """
+    try:
+        pixel_sizes = tuple(int(size) for size in value.split(","))
+    except ValueError:
+        raise click.BadParameter(f"'{value}' is not a list of integers")
+    if any(size < 1 for size in pixel_sizes):
+        raise click.BadParameter("pixel sizes must be at least 1")
+    return pixel_sizes
+
+
+def _parse_formats(
+    ctx: click.Context, param: click.Parameter, value: str
+) -> tuple[str, ...]:
+    """
+    Parse a comma-separated list of output formats.
+
+    Raises:
+        click.BadParameter: If a format is empty
+    """
+    formats = tuple(format.strip() for format in value.split(","))
+    if not all(formats):
+        raise click.BadParameter(f"'{value}' is not a list of formats")
+    return formats
+
+
+def _metrics(profile: bool, trace_memory: bool) -> "Metrics | None":
+    """
+    Create the metrics recording the stages of each file, if profiling.
+
+    Memory tracing slows the stages down, so it is only enabled on request
+    and the times of a profile with memory should not be compared to the
+    times of a profile without.
+    """
+    if not (profile or trace_memory):
+        return None
+    from pixelate.metrics import Metrics
+
+    return Metrics(trace_memory=trace_memory)
 
 
 @click.command()
-@click.argument("input_path", type=str, required=True)
+@click.argument("input_path", type=str, required=False)
 @click.option(
     "--pixel-size",
-    type=int,
-    default=10,
-    help="Size of each pixel in the output image (default: 10)",
+    type=str,
+    default="10",
+    callback=_parse_pixel_sizes,
+    help="Size of each pixel in the output image, or comma-separated "
+    "sizes (default: 10)",
 )
 @click.option(
     "--format",
     type=str,
     default="png",
-    help="Output image format (default: png)",
+    callback=_parse_formats,
+    help="Output image format, or comma-separated formats (default: png)",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of processes used for folders (default: CPU count)",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Render every file, even if its output is up to date",
+)
+@click.option(
+    "--cache-dir",
+    type=str,
+    default=None,
+    help="Directory of the build manifest (default: next to the outputs)",
+)
+@click.option(
+    "--render-cache",
+    type=str,
+    default=None,
+    help="Directory keeping encoded images across runs, reused by "
+    "identical renders (default: in memory only)",
+)
+@click.option(
+    "--indexed",
+    is_flag=True,
+    help="Write palette-indexed images with 1, 2, 4 or 8 bits per pixel, "
+    "depending on the number of colors",
+)
+@click.option(
+    "--output-dir",
+    type=str,
+    default=None,
+    help="Directory of the output images, mirroring the subfolders of "
+    "folders (default: next to each markdown file)",
+)
+@click.option(
+    "--recursive",
+    "-r",
+    is_flag=True,
+    help="Process the markdown files of subfolders too",
+)
+@click.option(
+    "--include",
+    type=str,
+    multiple=True,
+    help="Only process the files of folders matching a glob pattern, "
+    "matched against the name or, with a '/', the relative path "
+    "(repeatable)",
+)
+@click.option(
+    "--exclude",
+    type=str,
+    multiple=True,
+    help="Leave out the files and subfolders of folders matching a glob "
+    "pattern (repeatable)",
 )
-def main(input_path: str, pixel_size: int, format: str) -> None:
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Read pixel grids row by row to reduce memory on huge grids",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and re-render files as they change",
+)
+@click.option(
+    "--atlas",
+    type=str,
+    default=None,
+    help="Pack every image into one atlas image, with a JSON index of "
+    "their rectangles next to it",
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    help="Keep running and render the requests of other pixelate "
+    "commands, which use the server automatically while it runs",
+)
+@click.option(
+    "--socket",
+    type=str,
+    default=None,
+    help="Path of the server socket (default: $PIXELATE_SOCKET, or "
+    "pixelate.sock in the runtime directory)",
+)
+@click.option(
+    "--no-server",
+    is_flag=True,
+    help="Render in this process, even if a server is running",
+)
+@click.option(
+    "--quiet",
+    is_flag=True,
+    help="Only report warnings and errors",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Report the time spent in each stage of each file",
+)
+@click.option(
+    "--profile-memory",
+    is_flag=True,
+    help="Also report the peak memory of each stage, which slows the "
+    "stages down (implies --profile)",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Export the profile to a file (implies --profile)",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["json", "chrome"]),
+    default="json",
+    help="Format of the exported profile: JSON records and summary, "
+    "or Chrome trace (default: json)",
+)
+def main(
+    input_path: str | None,
+    pixel_size: tuple[int, ...],
+    format: tuple[str, ...],
+    jobs: int | None,
+    force: bool,
+    cache_dir: str | None,
+    render_cache: str | None,
+    indexed: bool,
+    output_dir: str | None,
+    recursive: bool,
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+    stream: bool,
+    watch: bool,
+    atlas: str | None,
+    serve: bool,
+    socket: str | None,
+    no_server: bool,
+    quiet: bool,
+    profile: bool,
+    profile_memory: bool,
+    profile_output: Path | None,
+    profile_format: str,
+) -> None:
     """
     Generate pixel art images from markdown files with TOML frontmatter.
 
@@ -39,9 +244,103 @@ def main(input_path: str, pixel_size: int, format: str) -> None:
         pixelate foldername
 
         pixelate filename.md --pixel-size 20 --format png
+
+        pixelate filename.md --pixel-size 1,4,16,32 --format png,ico
+
+        pixelate foldername --jobs 4
+
+        pixelate foldername --force
+
+        pixelate foldername --indexed
+
+        pixelate foldername --render-cache ~/.cache/pixelate
+
+        pixelate foldername --recursive --output-dir build
+
+        pixelate foldername -r --include 'icons/*' --exclude drafts
+
+        pixelate foldername --watch
+
+        pixelate foldername --atlas sprites.png
+
+        pixelate --serve
+
+        pixelate foldername --quiet
+
+        pixelate foldername --profile --profile-output trace.json
+
+        pixelate foldername --profile-memory
     """
-    app: PixelateApp = PixelateApp()
-    app.run(input_path, pixel_size, format)
+    configure_logging(quiet)
+    if serve:
+        if stream:
+            # The runs handed over would all stream, without the render
+            # cache, while runs with --stream are never handed over
+            raise click.UsageError("--stream cannot be used with --serve.")
+        from pixelate.app import PixelateApp
+
+        PixelateApp(render_cache_dir=render_cache).serve(socket)
+        return
+    if input_path is None:
+        raise click.UsageError("Missing argument 'INPUT_PATH'.")
+
+    metrics = _metrics(profile or profile_output is not None, profile_memory)
+    if not (
+        watch or no_server or stream or render_cache or metrics is not None
+    ):
+        # Hand the run over to a server, if one is running
+        result = client.run(
+            input_path,
+            pixel_size,
+            format,
+            jobs,
+            force,
+            cache_dir,
+            atlas,
+            recursive,
+            include,
+            exclude,
+            output_dir,
+            indexed,
+            quiet,
+            Path(socket) if socket else None,
+        )
+        if result is not None:
+            status, messages = result
+            for message in messages:
+                print(message)
+            sys.exit(status)
+
+    # Pillow and the palettes are only imported once rendering starts here,
+    # keeping --help and the runs handed over to a server fast
+    from pixelate.app import PixelateApp
+
+    app: PixelateApp = PixelateApp(stream, metrics, render_cache)
+    try:
+        run = app.watch if watch else app.run
+        run(
+            input_path,
+            pixel_size,
+            format,
+            jobs,
+            force,
+            cache_dir,
+            atlas,
+            recursive,
+            include,
+            exclude,
+            output_dir,
+            indexed,
+        )
+    finally:
+        if metrics is not None and metrics.records:
+            print(f"\n{metrics.report()}")
+            if profile_output is not None:
+                if profile_format == "chrome":
+                    metrics.export_chrome_trace(profile_output)
+                else:
+                    metrics.export_json(profile_output)
+                print(f"Profile saved to: {profile_output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+"""
+Handles sending requests to a running render server.
+
+Only the standard library is imported here, so that a client starts
+without loading Pillow or the palettes.
+"""
+
+import base64
+import json
+import os
+import socket
+import stat
+import sys
+from collections.abc import Sequence
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+# Environment variable overriding the path of the server socket
+SOCKET_ENV = "PIXELATE_SOCKET"
+
+
+class ServerError(RuntimeError):
+    """The server could not handle a request."""
+
+
+def default_socket_path() -> Path:
+    """
+    Get the path of the server socket.
+
+    Returns:
+        The path set by $PIXELATE_SOCKET, or else "pixelate.sock" in the
+        runtime directory of the user (falling back to a private
+        "pixelate-UID" directory in the temporary directory)
+    """
+    if path := os.environ.get(SOCKET_ENV):
+        return Path(path)
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(runtime_dir) / "pixelate.sock"
+
+    import tempfile
+
+    return (
+        Path(tempfile.gettempdir())
+        / f"pixelate-{os.getuid()}"
+        / "pixelate.sock"
+    )
+
+
+def is_trusted(socket_path: Path) -> bool:
+    """
+    Check that a path is a socket created by the current user.
+
+    Another user could otherwise create the socket first, to receive the
+    requests and answer them.
+
+    Args:
+        socket_path: Path of the server socket
+    Returns:
+        Whether the path is a socket owned by the current user
+    """
+    try:
+        status = socket_path.lstat()
+    except OSError:
+        return False
+    return stat.S_ISSOCK(status.st_mode) and status.st_uid == os.getuid()
+
+
+@cache
+def package_version() -> str:
+    """
+    Get the installed version of pixelate, as told by its dist-info.
+
+    The folder is looked up on sys.path as importlib.metadata would,
+    without importing it, which takes longer than a whole request.
+
+    Returns:
+        The version, or "unknown" if pixelate is not installed
+    """
+    prefix, suffix = "pixelate-", ".dist-info"
+    for entry in sys.path:
+        try:
+            names = os.listdir(entry or ".")
+        except OSError:
+            continue
+        for name in names:
+            if name.startswith(prefix) and name.endswith(suffix):
+                return name[len(prefix) : -len(suffix)]
+    return "unknown"
+
+
+def send(
+    message: dict[str, Any], socket_path: Path | None = None
+) -> dict[str, Any] | None:
+    """
+    Send a request to the server, and wait for its response.
+
+    Requests and responses are single lines of JSON. Requests carry the
+    version of the client, and the server refuses those of another
+    version, see RenderServer.respond.
+
+    Args:
+        message: The request
+        socket_path: Path of the server socket (default:
+            default_socket_path())
+    Returns:
+        The response, or None if no server is running, or the socket is
+        not trusted, see is_trusted
+    Raises:
+        ServerError: If the server closed the connection without response
+    """
+    if socket_path is None:
+        socket_path = default_socket_path()
+    if not is_trusted(socket_path):
+        return None
+
+    message = {**message, "version": package_version()}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        client.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with client.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ServerError("The server closed the connection")
+    response: dict[str, Any] = json.loads(line)
+    return response
+
+
+def run(
+    input_path_name: str,
+    pixel_size: Sequence[int],
+    format: Sequence[str],
+    jobs: int | None = None,
+    force: bool = False,
+    cache_dir: str | None = None,
+    atlas: str | None = None,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    output_dir: str | None = None,
+    indexed: bool = False,
+    quiet: bool = False,
+    socket_path: Path | None = None,
+) -> tuple[int, list[str]] | None:
+    """
+    Run the pixelate application in the server, see PixelateApp.run.
+
+    Relative paths are resolved from the current directory of the client.
+
+    Args:
+        input_path_name: Path to a file or folder to process
+        pixel_size: Sizes of each pixel in the output images
+        format: Output image formats
+        jobs: Number of processes for folders (default: CPU count)
+        force: Whether to render files whose output is up to date
+        cache_dir: Directory of the build manifest
+        atlas: Optional path to an atlas image packing every image
+        recursive: Whether to process the subfolders of folders too
+        include: Glob patterns of the files of folders to process
+        exclude: Glob patterns of the files and subfolders to leave out
+        output_dir: Directory of the output images
+        indexed: Whether to write palette-indexed images
+        quiet: Whether to only report warnings and errors
+        socket_path: Path of the server socket (default:
+            default_socket_path())
+    Returns:
+        Tuple of (status, messages), or None if no server of the same
+        version is running
+        - status: exit status of the run
+        - messages: the console output of the run, line by line
+    """
+    response = send(
+        {
+            "command": "run",
+            "cwd": os.getcwd(),
+            "quiet": quiet,
+            "args": {
+                "input_path_name": input_path_name,
+                "pixel_size": list(pixel_size),
+                "format": list(format),
+                "jobs": jobs,
+                "force": force,
+                "cache_dir": cache_dir,
+                "atlas": atlas,
+                "recursive": recursive,
+                "include": list(include),
+                "exclude": list(exclude),
+                "output_dir": output_dir,
+                "indexed": indexed,
+            },
+        },
+        socket_path,
+    )
+    if response is None or response.get("version") != package_version():
+        # The run was refused, and is left to the client
+        return None
+    return int(response["status"]), list(response["messages"])
+
+
+def render(
+    markdown: str | Path,
+    pixel_size: int | Sequence[int] = 10,
+    format: str = "png",
+    socket_path: Path | None = None,
+) -> bytes:
+    """
+    Render markdown content, or a markdown file, in the server.
+
+    Args:
+        markdown: Content of a markdown file, or path to a markdown file
+        pixel_size: Size, or sizes, of each pixel in the image
+        format: Image format (e.g., "png", "ico")
+        socket_path: Path of the server socket (default:
+            default_socket_path())
+    Returns:
+        The content of the image file
+    Raises:
+        ConnectionError: If no server is running
+        ServerError: If the image could not be rendered, or the server
+            runs another version
+    """
+    message: dict[str, Any] = {
+        "command": "render",
+        "pixel_size": (
+            [pixel_size] if isinstance(pixel_size, int) else list(pixel_size)
+        ),
+        "format": format,
+    }
+    if isinstance(markdown, Path):
+        message["path"] = str(markdown.absolute())
+    else:
+        message["text"] = markdown
+
+    response = send(message, socket_path)
+    if response is None:
+        raise ConnectionError("No pixelate server is running")
+    if response["status"] != 0:
+        raise ServerError(response["error"])
+    return base64.b64decode(response["data"])
@@ -0,0 +1,35 @@
+"""
+Handles console output, written through the logging module.
+"""
+
+import logging
+import sys
+
+# Parent logger of every module of the package
+LOGGER_NAME = "pixelate"
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Formats messages as plain lines, prefixing warnings and errors."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname.capitalize()}: {message}"
+        return message
+
+
+def configure_logging(quiet: bool = False) -> None:
+    """
+    Write the messages of the package to the console.
+
+    Args:
+        quiet: Whether to only write warnings and errors
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(ConsoleFormatter())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [handler]
+    logger.setLevel(logging.WARNING if quiet else logging.INFO)
+    logger.propagate = False
@@ -0,0 +1,104 @@
+"""
+Handles discovering the markdown files of a folder.
+"""
+
+import os
+from collections.abc import Iterator, Sequence
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+
+def scan_markdown_files(
+    root: Path,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+) -> Iterator[os.DirEntry[str]]:
+    """
+    Walk a folder for markdown files, yielding them as they are found.
+
+    Files of each folder are yielded in sorted order, before the files of
+    its subfolders. Symbolic links to folders are not followed.
+
+    Patterns are matched against the path relative to ``root``, with "/"
+    separators (e.g. "icons/*.md"), or against the name alone when they
+    do not contain "/". Excluded folders are not walked.
+
+    Args:
+        root: Folder to walk
+        recursive: Whether to walk subfolders too
+        include: Patterns of the files to keep (default: every file)
+        exclude: Patterns of the files and folders to leave out
+    Yields:
+        The directory entry of each markdown file
+    """
+    folders = [(root, "")]
+    while folders:
+        folder, prefix = folders.pop()
+        try:
+            with os.scandir(folder) as scanned:
+                entries = sorted(scanned, key=lambda entry: entry.name)
+        except OSError:
+            # The folder was removed or cannot be read
+            continue
+
+        subfolders: list[tuple[Path, str]] = []
+        for entry in entries:
+            relative = prefix + entry.name
+            if _matches(relative, entry.name, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subfolders.append((Path(entry.path), relative + "/"))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if not entry.name.lower().endswith(".md"):
+                continue
+            if include and not _matches(relative, entry.name, include):
+                continue
+            yield entry
+
+        # Walk the subfolders in sorted order
+        folders.extend(reversed(subfolders))
+
+
+def iter_markdown_files(
+    root: Path,
+    recursive: bool = False,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+) -> Iterator[Path]:
+    """
+    Walk a folder for markdown files, see scan_markdown_files.
+
+    Args:
+        root: Folder to walk
+        recursive: Whether to walk subfolders too
+        include: Patterns of the files to keep (default: every file)
+        exclude: Patterns of the files and folders to leave out
+    Yields:
+        The path of each markdown file
+    """
+    for entry in scan_markdown_files(root, recursive, include, exclude):
+        yield Path(entry.path)
+
+
+def _matches(relative: str, name: str, patterns: Sequence[str]) -> bool:
+    """
+    Check whether a file or folder matches any of the patterns.
+
+    Args:
+        relative: Path relative to the walked folder, with "/" separators
+        name: Name of the file or folder
+        patterns: Glob patterns
+    Returns:
+        Whether any pattern matches
+    """
+    return any(
+        fnmatchcase(relative if "/" in pattern else name, pattern)
+        for pattern in patterns
+    )
@@ -0,0 +1,26 @@
+"""
+Exceptions raised when markdown content cannot be rendered.
+
+Every exception is a ValueError, so that code catching ValueError keeps
+handling them.
+"""
+
+
+class PixelateError(ValueError):
+    """Markdown content, or a rendering setting, is invalid."""
+
+
+class FrontmatterError(PixelateError):
+    """The TOML frontmatter is missing or invalid."""
+
+
+class ColorError(FrontmatterError):
+    """A color definition cannot be resolved."""
+
+
+class GridError(PixelateError):
+    """The pixel grid is empty, malformed or uses undefined color keys."""
+
+
+class OutputFormatError(PixelateError):
+    """The image format is unknown, or cannot hold the requested sizes."""
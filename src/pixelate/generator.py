@@ -2,7 +2,33 @@
 Handles generating images from pixel data.
 """
 
-from PIL import Image, ImageDraw
+import logging
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+from PIL import Image
+
+from pixelate import palette
+from pixelate.errors import GridError
+from pixelate.grid import PixelGrid
+
+logger = logging.getLogger(__name__)
+
+# Background of the canvas, used for cells that are not drawn
+TRANSPARENT: tuple[int, int, int, int] = (255, 255, 255, 0)
+
+# Maximum number of skipped values warned about for each image
+SKIPPED_WARNINGS_LIMIT = 10
+
+
+class _Cells(NamedTuple):
+    """A pixel grid packed into RGBA bytes, one pixel per cell."""
+
+    data: bytes | bytearray
+    total_cols: int
+    total_rows: int
+    skipped: set[tuple[int, int]]
 
 
 class ImageGenerator:
@@ -18,84 +44,391 @@ class ImageGenerator:
         Raises:
             ValueError: If the hex color format is invalid
         """
-        hex_color = hex_color.lstrip("#")
-
-        if len(hex_color) == 6:
-            # RGB format: #RRGGBB
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            a = 255  # Fully opaque
-        elif len(hex_color) == 8:
-            # RGBA format: #RRGGBBAA
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            a = int(hex_color[6:8], 16)
-        else:
-            raise ValueError(f"Invalid hex color format: {hex_color}")
-
-        return (r, g, b, a)
+        # Colors resolved by the parser are already decoded, under the
+        # same canonical hex code
+        return palette.decode("#" + hex_color.lstrip("#")).rgba
 
     def generate(
         self,
         color_dict: dict[str, str],
-        pixel_grid: list[list[str]],
+        pixel_grid: list[list[str]] | PixelGrid,
         pixel_size: int,
     ) -> Image.Image:
         """
         Generate an image from the pixel grid and color dictionary.
 
+        The grid is first packed into a one-pixel-per-cell RGBA image,
+        with each color decoded once, and then scaled up by nearest
+        neighbour resampling.
+
         Args:
             color_dict: Mapping of number strings to hex colors
-            pixel_grid: 2D list representing the pixel art
+            pixel_grid: 2D list or PixelGrid representing the pixel art
             pixel_size: Size of each pixel in the output image (in pixels)
         Returns:
             The generated PIL Image object
         """
         if (not pixel_grid) or (not pixel_grid[0]):
-            raise ValueError("Pixel grid is empty")
+            raise GridError("Pixel grid is empty")
+
+        return self._compose(self._pack(color_dict, pixel_grid), pixel_size)
+
+    def generate_rows(
+        self,
+        color_dict: dict[str, str],
+        rows: Iterable[Sequence[str]],
+        pixel_size: int,
+    ) -> Image.Image:
+        """
+        Generate an image from the rows of a pixel grid, as they come.
+
+        Each row is packed into RGBA bytes as soon as it is read, so only
+        the one-pixel-per-cell image is kept until it is scaled up, never
+        the rows themselves.
+
+        Args:
+            color_dict: Mapping of number strings to hex colors
+            rows: Rows of the pixel grid, e.g. from PixelArtParser.stream
+            pixel_size: Size of each pixel in the output image (in pixels)
+        Returns:
+            The generated PIL Image object
+        """
+        return self._compose(self._pack(color_dict, rows), pixel_size)
+
+    def generate_sizes(
+        self,
+        color_dict: dict[str, str],
+        pixel_grid: Iterable[Sequence[str]] | PixelGrid,
+        pixel_sizes: Sequence[int],
+        indexed: bool = False,
+    ) -> list[Image.Image]:
+        """
+        Generate images of several pixel sizes from a single packing.
+
+        Args:
+            color_dict: Mapping of number strings to hex colors
+            pixel_grid: 2D list, PixelGrid or rows of the pixel grid
+            pixel_sizes: Sizes of each pixel in the output images
+            indexed: Whether to generate palette-indexed images when
+                possible, see _index
+        Returns:
+            The generated PIL Image objects, one per pixel size
+        """
+        if (
+            indexed
+            and isinstance(pixel_grid, PixelGrid)
+            and (image := self._index(color_dict, pixel_grid)) is not None
+        ):
+            return [
+                image.resize(
+                    (image.width * pixel_size, image.height * pixel_size),
+                    Image.Resampling.NEAREST,
+                )
+                for pixel_size in pixel_sizes
+            ]
 
-        total_rows = len(pixel_grid)
-        total_cols = len(pixel_grid[0])
+        cells = self._pack(color_dict, pixel_grid)
+        return [self._compose(cells, pixel_size) for pixel_size in pixel_sizes]
+
+    def _pack(
+        self,
+        color_dict: dict[str, str],
+        pixel_grid: Iterable[Sequence[str]] | PixelGrid,
+    ) -> _Cells:
+        """
+        Pack a pixel grid into RGBA bytes, one pixel per cell.
+
+        Args:
+            color_dict: Mapping of number strings to hex colors
+            pixel_grid: 2D list, PixelGrid or rows of the pixel grid
+        Returns:
+            The packed cells
+        Raises:
+            GridError: If the pixel grid is empty
+        """
+        rgba_table, invalid_colors = self._rgba_table(color_dict)
 
-        # Create image with RGBA mode for transparency support
-        img_width = total_cols * pixel_size
-        img_height = total_rows * pixel_size
-        image = Image.new(
-            "RGBA", (img_width, img_height), (255, 255, 255, 0)
-        )  # Transparent background
-        draw = ImageDraw.Draw(image)
+        # Fast path: a compact grid maps its codes onto colors in one pass
+        if isinstance(pixel_grid, PixelGrid) and (
+            data := self._pack_codes(rgba_table, pixel_grid)
+        ):
+            return _Cells(data, pixel_grid.width, pixel_grid.height, set())
 
+        skipped: set[tuple[int, int]] = set()
+        skipped_values: Counter[str] = Counter()
+        first_skipped: dict[str, tuple[int, int]] = {}
+        packed = bytearray()
+        total_rows = total_cols = 0
         for row_idx, row in enumerate(pixel_grid):
-            for col_idx, cell_value in enumerate(row):
-                cell_value = cell_value.strip()
-                # Get color from dictionary
-                if cell_value in color_dict:
-                    hex_color: str = color_dict[cell_value]
-                    try:
-                        rgba_color: tuple[int, int, int, int] = (
-                            self.hex_to_rgba(hex_color)
-                        )
-                    except ValueError as e:
-                        print(
-                            f"Warning: {e}, "
-                            f"skipping cell at ({row_idx}, {col_idx})"
-                        )
-                        continue
-                else:
-                    print(
-                        f"Warning: Color not found for value '{cell_value}', "
-                        f"skipping cell at ({row_idx}, {col_idx})"
-                    )
-                    continue
-
-                # Draw pixel
-                x1: int = col_idx * pixel_size
-                y1: int = row_idx * pixel_size
-                x2: int = x1 + pixel_size
-                y2: int = y1 + pixel_size
-
-                draw.rectangle((x1, y1, x2, y2), fill=rgba_color)
+            if row_idx == 0:
+                total_cols = len(row)
+            packed += self._pack_row(
+                rgba_table,
+                row,
+                row_idx,
+                total_cols,
+                skipped,
+                skipped_values,
+                first_skipped,
+            )
+            total_rows += 1
+
+        if not total_cols:
+            raise GridError("Pixel grid is empty")
+
+        self._warn_skipped(invalid_colors, skipped_values, first_skipped)
+
+        return _Cells(packed, total_cols, total_rows, skipped)
+
+    def _rgba_table(
+        self, color_dict: dict[str, str]
+    ) -> tuple[dict[str, bytes], dict[str, str]]:
+        """
+        Decode every color of the dictionary into packed RGBA bytes.
+
+        Args:
+            color_dict: Mapping of number strings to hex colors
+        Returns:
+            Tuple of (rgba_table, invalid_colors)
+            - rgba_table: mapping of number strings to 4-byte RGBA values
+            - invalid_colors: mapping of number strings to the error of
+              colors with an invalid hex format
+        """
+        rgba_table: dict[str, bytes] = {}
+        invalid_colors: dict[str, str] = {}
+        for key, hex_color in color_dict.items():
+            try:
+                rgba_table[key] = bytes(self.hex_to_rgba(hex_color))
+            except ValueError as e:
+                invalid_colors[key] = str(e)
+        return rgba_table, invalid_colors
+
+    def _pack_codes(
+        self, rgba_table: dict[str, bytes], pixel_grid: PixelGrid
+    ) -> bytes:
+        """
+        Pack the codes of a compact pixel grid into RGBA bytes.
+
+        Args:
+            rgba_table: Mapping of number strings to 4-byte RGBA values
+            pixel_grid: The compact pixel grid
+        Returns:
+            The grid as RGBA bytes, or empty bytes if any key of the grid
+            has no valid color
+        """
+        if not all(key in rgba_table for key in pixel_grid.keys):
+            return b""
+        code_table = [rgba_table[key] for key in pixel_grid.keys]
+
+        codes = pixel_grid.codes
+        if codes.typecode == "B":
+            # Byte codes are mapped through an RGBA palette by Pillow
+            indexed = Image.frombytes(
+                "P", (pixel_grid.width, pixel_grid.height), codes.tobytes()
+            )
+            indexed.putpalette(b"".join(code_table), "RGBA")
+            return indexed.convert("RGBA").tobytes()
+
+        # Join row by row to keep the join buffers small
+        packed = bytearray()
+        for start in range(0, len(codes), pixel_grid.width):
+            row = codes[start : start + pixel_grid.width]
+            packed += b"".join(map(code_table.__getitem__, row))
+        return bytes(packed)
+
+    def _index(
+        self, color_dict: dict[str, str], pixel_grid: PixelGrid
+    ) -> Image.Image | None:
+        """
+        Pack a compact pixel grid into a palette-indexed ("P") image.
+
+        The palette only holds the distinct colors in use, translucent
+        ones first, whose alpha is stored as the "transparency" of the
+        image (the tRNS chunk of a PNG). Encoders can then store one
+        byte, or with few colors a few bits, per pixel instead of four.
+
+        Args:
+            color_dict: Mapping of number strings to hex colors
+            pixel_grid: The compact pixel grid
+        Returns:
+            The image, one pixel per cell, or None if the grid is empty,
+            has more than 256 keys or a key without a valid color
+        """
+        rgba_table, _ = self._rgba_table(color_dict)
+        keys = pixel_grid.keys
+        if (
+            not pixel_grid.width
+            or pixel_grid.codes.typecode != "B"
+            or not all(key in rgba_table for key in keys)
+        ):
+            return None
+
+        size = (pixel_grid.width, pixel_grid.height)
+        data = pixel_grid.codes.tobytes()
+        counts = Image.frombytes("P", size, data).histogram()
+        used = [code for code in range(len(keys)) if counts[code]]
+        colors = sorted(
+            {rgba_table[keys[code]] for code in used},
+            key=lambda rgba: (rgba[3] == 255, rgba),
+        )
+
+        # Map the codes of the grid onto the palette
+        palette_index = {rgba: index for index, rgba in enumerate(colors)}
+        lookup = bytearray(256)
+        for code in used:
+            lookup[code] = palette_index[rgba_table[keys[code]]]
+        image = Image.frombytes("P", size, data.translate(lookup))
+        image.putpalette(b"".join(rgba[:3] for rgba in colors), "RGB")
+        if alphas := bytes(rgba[3] for rgba in colors if rgba[3] != 255):
+            image.info["transparency"] = alphas
+        return image
+
+    def _pack_row(
+        self,
+        rgba_table: dict[str, bytes],
+        row: Sequence[str],
+        row_idx: int,
+        total_cols: int,
+        skipped: set[tuple[int, int]],
+        skipped_values: Counter[str],
+        first_skipped: dict[str, tuple[int, int]],
+    ) -> bytes:
+        """
+        Pack a row of the pixel grid into RGBA bytes.
+
+        Cells that cannot be drawn are filled with the transparent
+        background and recorded in ``skipped``. Cells whose value has no
+        valid color are counted by value, to be warned about once.
+
+        Args:
+            rgba_table: Mapping of number strings to 4-byte RGBA values
+            row: Row of the pixel grid
+            row_idx: Index of the row in the pixel grid
+            total_cols: Number of columns of the image
+            skipped: Set collecting the (row, column) of skipped cells
+            skipped_values: Counter of the skipped cells of each value
+            first_skipped: Mapping of values to their first skipped cell
+        Returns:
+            The row as ``total_cols * 4`` bytes of RGBA data
+        """
+        # Fast path: every cell maps straight onto a known color
+        if len(row) == total_cols:
+            try:
+                return b"".join(map(rgba_table.__getitem__, row))
+            except KeyError:
+                pass
+
+        background = bytes(TRANSPARENT)
+        packed: list[bytes] = []
+        for col_idx in range(max(total_cols, len(row))):
+            if col_idx >= len(row):
+                # Short rows leave the remaining cells undrawn
+                skipped.add((row_idx, col_idx))
+                packed.append(background)
+                continue
+
+            cell_value = row[col_idx].strip()
+            if cell_value in rgba_table:
+                # Cells of long rows fall outside of the image
+                if col_idx < total_cols:
+                    packed.append(rgba_table[cell_value])
+                continue
+
+            skipped_values[cell_value] += 1
+            first_skipped.setdefault(cell_value, (row_idx, col_idx))
+            if col_idx < total_cols:
+                skipped.add((row_idx, col_idx))
+                packed.append(background)
+
+        return b"".join(packed)
+
+    def _warn_skipped(
+        self,
+        invalid_colors: dict[str, str],
+        skipped_values: Counter[str],
+        first_skipped: dict[str, tuple[int, int]],
+    ) -> None:
+        """
+        Warn once about each value whose cells were skipped.
+
+        Only the most skipped values are warned about, up to
+        SKIPPED_WARNINGS_LIMIT, followed by a count of the others.
+
+        Args:
+            invalid_colors: Mapping of number strings to color errors
+            skipped_values: Counter of the skipped cells of each value
+            first_skipped: Mapping of values to their first skipped cell
+        """
+        most_skipped = skipped_values.most_common()
+        for cell_value, count in most_skipped[:SKIPPED_WARNINGS_LIMIT]:
+            reason = invalid_colors.get(
+                cell_value, f"Color not found for value '{cell_value}'"
+            )
+            logger.warning(
+                "%s, skipped %d cell(s), first at (%d, %d)",
+                reason,
+                count,
+                *first_skipped[cell_value],
+            )
+        if others := most_skipped[SKIPPED_WARNINGS_LIMIT:]:
+            logger.warning(
+                "Skipped %d more cell(s) of %d other value(s)",
+                sum(count for _, count in others),
+                len(others),
+            )
+
+    def _compose(self, cells: _Cells, pixel_size: int) -> Image.Image:
+        """
+        Scale packed RGBA cells up to the final image.
+
+        Cells are drawn as rectangles that include their right and bottom
+        edges, so the first row and column of a skipped cell keep the
+        color of the neighbouring cells above and to the left of it. The
+        same edges are restored here so that the output matches a
+        cell-by-cell drawing exactly.
+
+        Args:
+            cells: The packed cells
+            pixel_size: Size of each pixel in the output image (in pixels)
+        Returns:
+            The generated PIL Image object
+        """
+        data, total_cols, total_rows, skipped = cells
+        image = Image.frombytes("RGBA", (total_cols, total_rows), data).resize(
+            (total_cols * pixel_size, total_rows * pixel_size),
+            Image.Resampling.NEAREST,
+        )
+
+        def drawn(row_idx: int, col_idx: int) -> bool:
+            return (
+                row_idx >= 0
+                and col_idx >= 0
+                and (row_idx, col_idx) not in skipped
+            )
+
+        def rgba(row_idx: int, col_idx: int) -> tuple[int, ...]:
+            offset = (row_idx * total_cols + col_idx) * 4
+            return tuple(data[offset : offset + 4])
+
+        for row_idx, col_idx in sorted(skipped):
+            x: int = col_idx * pixel_size
+            y: int = row_idx * pixel_size
+            above = drawn(row_idx - 1, col_idx)
+            left = drawn(row_idx, col_idx - 1)
+            if above:
+                image.paste(
+                    rgba(row_idx - 1, col_idx),
+                    (x, y, x + pixel_size, y + 1),
+                )
+            if left:
+                image.paste(
+                    rgba(row_idx, col_idx - 1),
+                    (x, y, x + 1, y + pixel_size),
+                )
+            elif not above and drawn(row_idx - 1, col_idx - 1):
+                image.paste(
+                    rgba(row_idx - 1, col_idx - 1),
+                    (x, y, x + 1, y + 1),
+                )
 
         return image
@@ -0,0 +1,186 @@
+"""
+Compact array-backed representation of a pixel grid.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+
+from pixelate.errors import GridError
+
+
+def typecode_for(total_keys: int) -> str:
+    """
+    Select the smallest array typecode able to hold every key code.
+
+    Args:
+        total_keys: Number of distinct keys in the grid
+    Returns:
+        The array typecode ("B", "H" or "L")
+    """
+    if total_keys <= 1 << 8:
+        return "B"
+    if total_keys <= 1 << 16:
+        return "H"
+    return "L"
+
+
+class PixelGrid:
+    """
+    A pixel grid storing one small integer code per cell.
+
+    Color keys are interned into a key table, so that each cell only costs
+    one or two bytes instead of a Python string inside nested lists. Rows
+    can still be read back as lists of keys for compatibility.
+    """
+
+    def __init__(
+        self, width: int, height: int, keys: Sequence[str], codes: array
+    ) -> None:
+        if len(codes) != width * height:
+            raise ValueError(
+                f"Pixel grid of {height} rows and {width} columns "
+                f"requires {width * height} cells, found {len(codes)}"
+            )
+        self._width = width
+        self._height = height
+        self._keys: tuple[str, ...] = tuple(keys)
+        self._codes = codes
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Sequence[str]],
+        keys: Iterable[str] = (),
+    ) -> "PixelGrid":
+        """
+        Build a compact pixel grid from rows of color keys.
+
+        Args:
+            rows: Rows of the pixel grid, all of the same length
+            keys: Optional keys to intern first, in order
+        Returns:
+            The compact pixel grid
+        Raises:
+            GridError: If the rows do not have the same number of columns
+        """
+        codebook: dict[str, int] = {}
+        for key in keys:
+            codebook.setdefault(key, len(codebook))
+
+        codes = array(typecode_for(len(codebook)))
+        width: int | None = None
+        height = 0
+        for row in rows:
+            if width is None:
+                width = len(row)
+            elif len(row) != width:
+                raise GridError(
+                    f"Inconsistent number of columns in pixel grid: "
+                    f"expected {width}, found {len(row)}"
+                )
+            for key in row:
+                if key not in codebook:
+                    codebook[key] = len(codebook)
+            # Widen the codes once the key table outgrows the typecode
+            if (typecode := typecode_for(len(codebook))) != codes.typecode:
+                codes = array(typecode, codes)
+            codes.extend(map(codebook.__getitem__, row))
+            height += 1
+
+        return cls(width or 0, height, tuple(codebook), codes)
+
+    @classmethod
+    def from_code_rows(
+        cls, rows: Iterable[Sequence[int] | array], keys: Sequence[str]
+    ) -> "PixelGrid":
+        """
+        Build a compact pixel grid from rows of key codes.
+
+        Args:
+            rows: Rows of codes into ``keys``, all of the same length;
+                arrays of typecode ``typecode_for(len(keys))`` are copied
+                directly
+            keys: The key of each code
+        Returns:
+            The compact pixel grid
+        Raises:
+            GridError: If the rows do not have the same number of columns
+        """
+        codes = array(typecode_for(len(keys)))
+        width: int | None = None
+        height = 0
+        for row in rows:
+            if width is None:
+                width = len(row)
+            elif len(row) != width:
+                raise GridError(
+                    f"Inconsistent number of columns in pixel grid: "
+                    f"expected {width}, found {len(row)}"
+                )
+            codes.extend(row)
+            height += 1
+
+        return cls(width or 0, height, keys, codes)
+
+    @property
+    def width(self) -> int:
+        """Return the number of columns of the grid."""
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """Return the number of rows of the grid."""
+        return self._height
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        """Return the color keys, indexed by their code."""
+        return self._keys
+
+    @property
+    def codes(self) -> array:
+        """Return the row-major array of key codes, one per cell."""
+        return self._codes
+
+    @property
+    def codebook(self) -> dict[str, int]:
+        """Return the mapping of color keys to their code."""
+        return {key: code for code, key in enumerate(self._keys)}
+
+    def tolist(self) -> list[list[str]]:
+        """
+        Convert the grid to a 2D list of color keys.
+
+        Returns:
+            A 2D list of strings representing the pixel grid
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        return self._height
+
+    def __getitem__(self, row_idx: int) -> list[str]:
+        if not -self._height <= row_idx < self._height:
+            raise IndexError("Pixel grid row index out of range")
+        start = (row_idx % self._height) * self._width
+        row = self._codes[start : start + self._width]
+        return list(map(self._keys.__getitem__, row))
+
+    def __iter__(self) -> Iterator[list[str]]:
+        for row_idx in range(self._height):
+            yield self[row_idx]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PixelGrid):
+            return self.tolist() == other.tolist()
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"PixelGrid(width={self._width}, height={self._height}, "
+            f"keys={self._keys!r})"
+        )
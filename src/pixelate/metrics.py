@@ -0,0 +1,318 @@
+"""
+Handles recording the time and memory spent in each processing stage.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# Stage recorded around the whole processing of a file
+TOTAL = "total"
+
+
+class StageRecord(NamedTuple):
+    """The time and memory spent in a stage of processing a file."""
+
+    file: str
+    stage: str
+    start: float  # Wall clock time at the start of the stage, in seconds
+    seconds: float
+    allocated: int | None  # Peak memory allocated, or None if not traced
+    pid: int
+
+
+class Metrics:
+    """
+    Records the time and memory spent in each stage of processing files.
+
+    Stages are recorded by the ``stage`` function while a file is
+    processed inside ``Metrics.file``. Each record is passed to the
+    optional callback as soon as it is recorded, and kept for the summary
+    and for exporting.
+
+    Memory is traced with tracemalloc, which slows processing down and
+    only sees memory allocated through Python, so it is opt-in.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        callback: Callable[[StageRecord], None] | None = None,
+    ) -> None:
+        """
+        Initialize the metrics.
+
+        Args:
+            trace_memory: Whether to record the peak memory of each stage
+            callback: Optional function called with each new record
+        """
+        self._trace_memory = trace_memory
+        self._callback = callback
+        self._records: list[StageRecord] = []
+        self._file: str = ""
+        self._file_peak = 0
+
+    @property
+    def trace_memory(self) -> bool:
+        """Return whether the peak memory of each stage is recorded."""
+        return self._trace_memory
+
+    @property
+    def records(self) -> list[StageRecord]:
+        """Return the records, in the order they were recorded."""
+        return self._records
+
+    def add(self, record: StageRecord) -> None:
+        """
+        Add a record, e.g. one received from a worker process.
+
+        Args:
+            record: The record to add
+        """
+        self._records.append(record)
+        if self._callback is not None:
+            self._callback(record)
+
+    def extend(self, records: Iterable[StageRecord]) -> None:
+        """
+        Add several records.
+
+        Args:
+            records: The records to add
+        """
+        for record in records:
+            self.add(StageRecord(*record))
+
+    def drain(self) -> list[StageRecord]:
+        """
+        Remove and return the records recorded so far.
+
+        Returns:
+            The records, in the order they were recorded
+        """
+        records, self._records = self._records, []
+        return records
+
+    @contextmanager
+    def file(self, file_path: Path) -> Iterator[None]:
+        """
+        Record the stages of processing a file.
+
+        The whole processing is recorded as the "total" stage.
+
+        Args:
+            file_path: Path to the processed file
+        """
+        started_tracing = self._trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        self._file, self._file_peak = str(file_path), 0
+        token = _active.set(self)
+        try:
+            with self._measure(TOTAL):
+                yield
+        finally:
+            _active.reset(token)
+            if started_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def _measure(self, stage: str) -> Iterator[None]:
+        """
+        Record the time and memory spent in a stage of the current file.
+
+        Args:
+            stage: Name of the stage
+        """
+        tracing = self._trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            if stage != TOTAL:
+                tracemalloc.reset_peak()
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            allocated = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                # The peak of the file is the highest peak of its stages
+                self._file_peak = max(self._file_peak, peak)
+                if stage == TOTAL:
+                    peak = self._file_peak
+                allocated = max(peak - baseline, 0)
+            self.add(
+                StageRecord(
+                    self._file, stage, start, seconds, allocated, os.getpid()
+                )
+            )
+
+    def summary(self, slowest: int = 5) -> dict[str, Any]:
+        """
+        Summarize the records over all files.
+
+        Args:
+            slowest: Number of slowest files to list
+        Returns:
+            Dictionary with:
+            - files: number of processed files
+            - stages: per stage, the count, total, p50 and p95 of the
+              seconds spent, and the maximum memory allocated if traced
+            - slowest: the slowest files and their total seconds
+        """
+        by_stage: dict[str, list[StageRecord]] = {}
+        for record in self._records:
+            by_stage.setdefault(record.stage, []).append(record)
+
+        stages: dict[str, dict[str, Any]] = {}
+        for stage, records in by_stage.items():
+            seconds = sorted(record.seconds for record in records)
+            allocated = [
+                record.allocated
+                for record in records
+                if record.allocated is not None
+            ]
+            stages[stage] = {
+                "count": len(seconds),
+                "total": sum(seconds),
+                "p50": _percentile(seconds, 50),
+                "p95": _percentile(seconds, 95),
+                "max_allocated": max(allocated) if allocated else None,
+            }
+
+        totals = sorted(
+            by_stage.get(TOTAL, []),
+            key=lambda record: record.seconds,
+            reverse=True,
+        )
+        return {
+            "files": len(totals),
+            "stages": stages,
+            "slowest": [
+                {"file": record.file, "seconds": record.seconds}
+                for record in totals[:slowest]
+            ],
+        }
+
+    def report(self, slowest: int = 5) -> str:
+        """
+        Format the summary of the records as a table.
+
+        Args:
+            slowest: Number of slowest files to list
+        Returns:
+            The summary, as printable text
+        """
+        summary = self.summary(slowest)
+        lines = [
+            f"Profile of {summary['files']} file(s):",
+            f"  {'stage':<8}{'count':>7}{'total':>12}{'p50':>12}"
+            f"{'p95':>12}{'peak':>12}",
+        ]
+        for stage, stats in summary["stages"].items():
+            peak = (
+                f"{stats['max_allocated'] / 2**20:>9.2f}MiB"
+                if stats["max_allocated"] is not None
+                else f"{'-':>12}"
+            )
+            lines.append(
+                f"  {stage:<8}{stats['count']:>7}"
+                f"{stats['total'] * 1e3:>10.2f}ms"
+                f"{stats['p50'] * 1e3:>10.2f}ms"
+                f"{stats['p95'] * 1e3:>10.2f}ms{peak}"
+            )
+        if summary["slowest"]:
+            lines.append("Slowest files:")
+            for entry in summary["slowest"]:
+                lines.append(
+                    f"  {entry['seconds'] * 1e3:>10.2f}ms  {entry['file']}"
+                )
+        return "\n".join(lines)
+
+    def export_json(self, output_path: Path) -> None:
+        """
+        Write the records and their summary as JSON.
+
+        Args:
+            output_path: Path to the JSON file
+        """
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "records": [record._asdict() for record in self._records],
+                    "summary": self.summary(),
+                },
+                f,
+                indent=1,
+            )
+
+    def export_chrome_trace(self, output_path: Path) -> None:
+        """
+        Write the records in the Chrome trace event format.
+
+        The trace can be opened in chrome://tracing or in Perfetto, with
+        one track per process.
+
+        Args:
+            output_path: Path to the trace file
+        """
+        events = [
+            {
+                "name": record.stage,
+                "cat": "pixelate",
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.seconds * 1e6,
+                "pid": record.pid,
+                "tid": record.pid,
+                "args": {
+                    "file": record.file,
+                    "allocated": record.allocated,
+                },
+            }
+            for record in self._records
+        ]
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+# Metrics recording the file processed in the current context, if any
+_active: ContextVar[Metrics | None] = ContextVar("metrics", default=None)
+
+
+def stage(name: str) -> AbstractContextManager[None]:
+    """
+    Record a stage of the file being processed, if metrics are recorded.
+
+    Args:
+        name: Name of the stage
+    Returns:
+        Context manager measuring the stage, doing nothing when no file
+        is processed inside Metrics.file
+    """
+    if (metrics := _active.get()) is None:
+        return nullcontext()
+    return metrics._measure(name)
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    """
+    Get a percentile of sorted values, by the nearest-rank method.
+
+    Args:
+        values: Sorted values, not empty
+        percent: Percentile, between 0 and 100
+    Returns:
+        The smallest value greater than or equal to ``percent`` percent
+        of the values
+    """
+    rank = max(-(-len(values) * percent // 100), 1)
+    return values[rank - 1]
@@ -1,3 +1,3 @@
-__all__ = ["PALETTES", "resolve_color"]
+__all__ = ["PALETTES", "Color", "decode", "resolve", "resolve_color"]
 
-from ._palette import PALETTES, resolve_color
+from ._palette import PALETTES, Color, decode, resolve, resolve_color
@@ -0,0 +1,221 @@
+"""
+Precompiled binary form of the color palettes.
+
+A compiled palette file stores the color names sorted by their UTF-8 bytes
+next to their colors packed as RGBA uint32 values, so that it can be
+memory-mapped and binary-searched without building per-color objects.
+
+Layout (little-endian):
+    magic               4 bytes, b"PXPL"
+    format version      uint32
+    source digest       32 bytes, SHA-256 of the palette TOML file
+    count               uint32, number of colors
+    name offsets        (count + 1) x uint32, into the name table
+    colors              count x uint32, packed as 0xRRGGBBAA
+    name table          UTF-8 names, concatenated in sorted order
+"""
+
+import hashlib
+import mmap
+import struct
+import tomllib
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+MAGIC = b"PXPL"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sI32sI")
+_UINT32 = struct.Struct("<I")
+
+
+def source_digest(source: bytes) -> bytes:
+    """
+    Compute the digest identifying the source of a compiled palette.
+
+    Args:
+        source: Content of the palette TOML file
+    Returns:
+        The SHA-256 digest of the content
+    """
+    return hashlib.sha256(source).digest()
+
+
+def _pack_rgba(hex_color: str) -> int:
+    """
+    Pack a hex color code into an RGBA uint32.
+
+    Args:
+        hex_color: Hex color string ("#RRGGBB" or "#RRGGBBAA")
+    Returns:
+        The color packed as 0xRRGGBBAA
+    Raises:
+        ValueError: If the hex color format is invalid
+    """
+    hex_part = hex_color.removeprefix("#")
+    if len(hex_part) == 6:
+        hex_part += "FF"
+    if len(hex_part) != 8:
+        raise ValueError(f"Invalid hex color format: {hex_color}")
+    return int(hex_part, 16)
+
+
+def compile_palette(colors: Mapping[str, str], source: bytes) -> bytes:
+    """
+    Compile a color palette into its binary form.
+
+    Args:
+        colors: Mapping of color names to hex color codes
+        source: Content of the palette TOML file the colors come from
+    Returns:
+        The compiled palette
+    Raises:
+        ValueError: If a hex color format is invalid
+    """
+    names = sorted(
+        (name.encode("utf-8"), _pack_rgba(hex_color))
+        for name, hex_color in colors.items()
+    )
+
+    offsets = [0]
+    for name, _ in names:
+        offsets.append(offsets[-1] + len(name))
+
+    return b"".join(
+        [
+            _HEADER.pack(
+                MAGIC, FORMAT_VERSION, source_digest(source), len(names)
+            ),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            struct.pack(f"<{len(names)}I", *(rgba for _, rgba in names)),
+            *(name for name, _ in names),
+        ]
+    )
+
+
+def write_compiled_palette(palette_file_path: Path) -> Path:
+    """
+    Compile a palette TOML file next to it, with a ".bin" suffix.
+
+    Args:
+        palette_file_path: Path to the palette TOML file
+    Returns:
+        Path to the compiled palette file
+    """
+    source = palette_file_path.read_bytes()
+    compiled = compile_palette(tomllib.loads(source.decode("utf-8")), source)
+    compiled_file_path = palette_file_path.with_suffix(".bin")
+    compiled_file_path.write_bytes(compiled)
+    return compiled_file_path
+
+
+class CompiledPalette:
+    """
+    Read-only color palette backed by a memory-mapped compiled file.
+
+    Only lookups from color names to hex color codes are supported.
+    """
+
+    def __init__(
+        self, buffer: mmap.mmap | bytes, expected_digest: bytes
+    ) -> None:
+        magic, version, digest, count = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a compiled palette of a supported format")
+        if digest != expected_digest:
+            raise ValueError("Compiled palette is stale")
+
+        self._buffer = buffer
+        self._count: int = count
+        self._offsets = _HEADER.size
+        self._colors = self._offsets + (count + 1) * _UINT32.size
+        self._names = self._colors + count * _UINT32.size
+        if len(buffer) != self._names + self._offset(count):
+            raise ValueError("Compiled palette is truncated")
+
+    @classmethod
+    def open(cls, path: Path, source: bytes) -> "CompiledPalette":
+        """
+        Memory-map a compiled palette file.
+
+        Args:
+            path: Path to the compiled palette file
+            source: Content of the palette TOML file it must match
+        Returns:
+            The compiled palette
+        Raises:
+            ValueError: If the file is not a compiled palette, or was not
+                compiled from ``source``
+        """
+        try:
+            with open(path, "rb") as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Invalid compiled palette {path}: {e}")
+        try:
+            return cls(buffer, source_digest(source))
+        except (ValueError, struct.error) as e:
+            buffer.close()
+            raise ValueError(f"Invalid compiled palette {path}: {e}")
+
+    def _offset(self, index: int) -> int:
+        return int(
+            _UINT32.unpack_from(
+                self._buffer, self._offsets + index * _UINT32.size
+            )[0]
+        )
+
+    def _name(self, index: int) -> bytes:
+        start = self._names + self._offset(index)
+        end = self._names + self._offset(index + 1)
+        return bytes(self._buffer[start:end])
+
+    def _find(self, name: str) -> int:
+        """
+        Binary-search the index of a color name.
+
+        Args:
+            name: Color name
+        Returns:
+            The index of the color, or -1 if the name is not found
+        """
+        target = name.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._name(low) == target:
+            return low
+        return -1
+
+    def __getitem__(self, name: str) -> str:
+        if (index := self._find(name)) < 0:
+            raise KeyError(name)
+        (rgba,) = _UINT32.unpack_from(
+            self._buffer, self._colors + index * _UINT32.size
+        )
+        if rgba & 0xFF == 0xFF:
+            return f"#{rgba >> 8:06X}"
+        return f"#{rgba:08X}"
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self._name(index).decode("utf-8")
+
+    def keys(self) -> set[str]:
+        """
+        Get the set of color names in the palette.
+
+        Returns:
+            The set of color names in the palette.
+        """
+        return set(self)
@@ -2,29 +2,71 @@
 Color palette definitions and utilities for the pixelate package.
 """
 
+import threading
 import tomllib
+from functools import lru_cache
 from importlib import resources
+from importlib.resources.abc import Traversable
 from pathlib import Path
+from typing import NamedTuple
 
+from pixelate.palette._compiled import CompiledPalette
 from pixelate.utility.bidict import BiDict
 from pixelate.utility.singleton import SingletonMeta
 
+# A palette loaded from its TOML file or from its compiled form
+Palette = BiDict | CompiledPalette
+
 
 class Palettes(metaclass=SingletonMeta):
-    """Handles loading and accessing color palettes."""
+    """
+    Handles loading and accessing color palettes.
+
+    Palettes are discovered by name when created, and each palette file is
+    only loaded the first time the palette is accessed. A palette is read
+    from its compiled ".bin" file when one matches its TOML file, and
+    parsed from the TOML file otherwise.
+    """
 
     def __init__(self) -> None:
-        self._palettes: dict[str, BiDict] = {}
+        self._palettes: dict[str, Palette] = {}
+        self._palette_files: dict[str, Traversable] = {}
+        self._lock = threading.Lock()
 
         # Get all TOML files from the assets directory
-        palette_assets = resources.files("pixelate.palette.assets")
-        for file_path in palette_assets.iterdir():
+        self._palette_assets = resources.files("pixelate.palette.assets")
+        for file_path in self._palette_assets.iterdir():
             if not file_path.name.endswith(".toml"):
                 continue
-            with resources.as_file(file_path) as palette_file_path:
-                self._palettes[palette_file_path.stem] = self._load_palette(
-                    palette_file_path
-                )
+            self._palette_files[file_path.name.removesuffix(".toml")] = (
+                file_path
+            )
+
+    def _open_palette(self, palette_name: str) -> Palette:
+        """
+        Open a color palette, preferring its compiled form.
+
+        Args:
+            palette_name: Name of the palette
+
+        Returns:
+            The compiled palette if it is present and up to date with the
+            TOML file, the palette loaded from the TOML file otherwise
+        """
+        palette_file = self._palette_files[palette_name]
+        compiled_file = self._palette_assets / f"{palette_name}.bin"
+        if compiled_file.is_file():
+            with resources.as_file(compiled_file) as compiled_file_path:
+                try:
+                    return CompiledPalette.open(
+                        compiled_file_path, palette_file.read_bytes()
+                    )
+                except ValueError:
+                    # Missing, stale or corrupt, fall back to the TOML file
+                    pass
+
+        with resources.as_file(palette_file) as palette_file_path:
+            return self._load_palette(palette_file_path)
 
     def _load_palette(self, palette_file_path: Path) -> BiDict:
         """
@@ -43,7 +85,7 @@ class Palettes(metaclass=SingletonMeta):
         try:
             with open(palette_file_path, "rb") as file:
                 palette = tomllib.load(file)
-            return BiDict(**palette)
+            return BiDict.from_items(palette)
         except FileNotFoundError:
             raise ValueError(f"Palette file not found: {palette_file_path}")
         except tomllib.TOMLDecodeError as e:
@@ -51,26 +93,104 @@ class Palettes(metaclass=SingletonMeta):
                 f"Error parsing TOML file {palette_file_path}: {e}"
             )
 
-    def __getitem__(self, palette_name: str) -> BiDict:
-        if palette_name not in self._palettes:
+    def __getitem__(self, palette_name: str) -> Palette:
+        if palette_name not in self._palette_files:
             raise ValueError(
                 f"Palette '{palette_name}' not found. "
-                f"Available palettes: {', '.join(self._palettes.keys())}"
+                f"Available palettes: {', '.join(self._palette_files.keys())}"
             )
-        return self._palettes[palette_name]
+        if (palette := self._palettes.get(palette_name)) is None:
+            with self._lock:
+                # Another thread may have loaded it while waiting
+                if (palette := self._palettes.get(palette_name)) is None:
+                    palette = self._open_palette(palette_name)
+                    self._palettes[palette_name] = palette
+        return palette
 
     def __contains__(self, palette_name: str) -> bool:
+        return palette_name in self._palette_files
+
+    def is_loaded(self, palette_name: str) -> bool:
+        """
+        Check whether a palette has already been loaded.
+
+        Args:
+            palette_name: Name of the palette
+        Returns:
+            Whether the palette file has been loaded
+        """
         return palette_name in self._palettes
 
     @property
     def names(self) -> tuple[str, ...]:
         """Return a tuple of available palette names."""
-        return tuple(self._palettes.keys())
+        return tuple(self._palette_files.keys())
 
 
 PALETTES = Palettes()
 
 
+class Color(NamedTuple):
+    """A resolved color, as a hex color code and as RGBA values."""
+
+    hex: str
+    rgba: tuple[int, int, int, int]
+
+
+RESOLVE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve(color_value: str) -> Color:
+    """
+    Resolve a color value to its hex color code and RGBA values.
+
+    Results are kept in a bounded LRU cache keyed on the raw color value,
+    so each distinct value is only validated and resolved once per
+    process. Cache statistics are available through
+    ``resolve.cache_info()``.
+
+    Args:
+        color_value: Color specification string, see resolve_color
+    Returns:
+        The resolved color
+    Raises:
+        ValueError: If color format is not recognized or color name not found
+    """
+    return decode(_resolve_hex(color_value))
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def decode(hex_color: str) -> Color:
+    """
+    Decode a hex color code into its RGBA values.
+
+    Results are kept in a bounded LRU cache keyed on the hex color code.
+    Colors resolved by resolve_color are in the canonical form used as
+    key here ("#" followed by uppercase digits), so decoding them again,
+    e.g. when rendering, is a cache hit instead of a second resolution.
+
+    Args:
+        hex_color: Hex color code, "#RRGGBB" or "#RRGGBBAA"
+    Returns:
+        The decoded color, with its canonical hex color code
+    Raises:
+        ValueError: If the hex color format is invalid
+    """
+    hex_color = _check_hex(hex_color)
+    hex_part = hex_color[1:]
+    alpha = int(hex_part[6:8], 16) if len(hex_part) == 8 else 255
+    return Color(
+        hex_color,
+        (
+            int(hex_part[0:2], 16),
+            int(hex_part[2:4], 16),
+            int(hex_part[4:6], 16),
+            alpha,
+        ),
+    )
+
+
 def resolve_color(color_value: str) -> str:
     """
     Resolve a color value to a hex color code.
@@ -79,6 +199,41 @@ def resolve_color(color_value: str) -> str:
     - Hex colors: "#FF0000", "#FF000080"
     - Named palette colors: "tableau:blue", "xkcd:drab", "css4:red", "base:r"
 
+    Args:
+        color_value: Color specification string
+    Returns:
+        Hex color code (with # prefix)
+    Raises:
+        ValueError: If color format is not recognized or color name not found
+    """
+    return resolve(color_value).hex
+
+
+def _check_hex(hex_color: str) -> str:
+    """
+    Validate a hex color code.
+
+    Args:
+        hex_color: Hex color code, with # prefix
+    Returns:
+        The hex color code in uppercase
+    Raises:
+        ValueError: If the hex color format is invalid
+    """
+    hex_part = hex_color[1:]
+    if (
+        not hex_color.startswith("#")
+        or len(hex_part) not in (6, 8)
+        or not all(c in "0123456789ABCDEFabcdef" for c in hex_part)
+    ):
+        raise ValueError(f"Invalid hex color format: {hex_color}")
+    return hex_color.upper()
+
+
+def _resolve_hex(color_value: str) -> str:
+    """
+    Resolve a color value to a hex color code, without caching.
+
     Args:
         color_value: Color specification string
     Returns:
@@ -90,13 +245,7 @@ def resolve_color(color_value: str) -> str:
 
     # Handle hex colors (existing functionality)
     if color_value.startswith("#"):
-        # Validate hex format
-        hex_part = color_value[1:]
-        if len(hex_part) not in (6, 8) or not all(
-            c in "0123456789ABCDEFabcdef" for c in hex_part
-        ):
-            raise ValueError(f"Invalid hex color format: {color_value}")
-        return color_value.upper()
+        return _check_hex(color_value)
 
     # Handle palette colors
     if ":" in color_value:
@@ -2,7 +2,8 @@
 Script to create color palette TOML files.
 
 This script creates TOML files for different color palettes.
-It converts color definitions to hex format and saves them as TOML files.
+It converts color definitions to hex format and saves them as TOML files,
+along with their precompiled binary form loaded at runtime.
 """
 
 from enum import Enum
@@ -10,6 +11,7 @@ from pathlib import Path
 
 import matplotlib.colors as mcolors
 
+from pixelate.palette._compiled import write_compiled_palette
 from pixelate.utility.bidict import BiDict
 
 
@@ -124,6 +126,12 @@ def main() -> None:
 
         print(f"Created {name}.toml with {len(palette)} colors")
 
+        # Compile the TOML file for fast loading
+        compiled_file_path = write_compiled_palette(
+            PALETTE_ASSETS_DIR / f"{name}.toml"
+        )
+        print(f"Created {compiled_file_path.name}")
+
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,22 @@
 Handles parsing of markdown files with TOML frontmatter and pixel data.
 """
 
+import logging
 import tomllib
+from array import array
+from collections.abc import Collection, Iterable, Iterator, Sequence
 from pathlib import Path
+from typing import Any
 
-from pixelate import palette
+from pixelate import metrics, palette
+from pixelate.errors import ColorError, FrontmatterError, GridError
+from pixelate.grid import PixelGrid, typecode_for
+
+logger = logging.getLogger(__name__)
+
+# Encodings of the pixel grid, selected by `[grid] encoding` in the
+# frontmatter: plain CSV, or CSV with run-lengths and repeated rows
+GRID_ENCODINGS = ("csv", "rle")
 
 
 class PixelArtParser:
@@ -13,115 +25,517 @@ class PixelArtParser:
     Handles parsing of markdown files with TOML frontmatter and pixel data.
     """
 
-    def parse(self, file_path: Path) -> tuple[dict[str, str], list[list[str]]]:
+    def parse(
+        self, file_path: Path, compact: bool = False
+    ) -> tuple[dict[str, str], list[list[str]] | PixelGrid]:
         """
         Parse a markdown file with TOML frontmatter and CSV content.
 
+        The grid is read as plain CSV, unless the frontmatter selects the
+        run-length encoding, see _iter_rle_rows.
+
+        Args:
+            file_path: Path to the markdown file
+            compact: Whether to return the pixel grid as a PixelGrid
         Returns:
             Tuple of (color_dict, pixel_grid)
             - color_dict: mapping of number strings to hex color codes
-            - pixel_grid: 2D list of strings representing the pixel grid
+            - pixel_grid: 2D list of strings representing the pixel grid,
+              or a PixelGrid with codes following the color_dict order
         """
-        with open(file_path, encoding="utf-8") as f:
+        with metrics.stage("read"), open(file_path, encoding="utf-8") as f:
             content = f.read()
 
+        return self.parse_text(content, compact)
+
+    def parse_text(
+        self, content: str, compact: bool = False
+    ) -> tuple[dict[str, str], list[list[str]] | PixelGrid]:
+        """
+        Parse the content of a markdown file, see parse.
+
+        Args:
+            content: The markdown content, with TOML frontmatter
+            compact: Whether to return the pixel grid as a PixelGrid
+        Returns:
+            Tuple of (color_dict, pixel_grid), see parse
+        """
         # Split content by +++ to extract frontmatter
         parts = content.split("+++")
         if len(parts) < 3:
-            raise ValueError(
+            raise FrontmatterError(
                 "Markdown file must have TOML frontmatter wrapped in +++"
             )
 
         # Parse TOML frontmatter (second part, first part is empty)
-        color_dict = self._parse_color(parts[1].strip())
+        color_dict, encoding = self._parse_frontmatter(parts[1].strip())
 
         # Parse CSV content (everything after the second +++)
-        pixel_grid = self._parse_grid(
-            "".join(parts[2:]).strip(), set(color_dict.keys())
-        )
+        with metrics.stage("grid"):
+            if encoding == "rle":
+                pixel_grid = self._parse_rle_grid(
+                    "".join(parts[2:]).strip(), color_dict.keys(), compact
+                )
+            else:
+                # The grid starts on the line of the second +++
+                first_line = parts[0].count("\n") + parts[1].count("\n") + 1
+                pixel_grid = self._parse_grid(
+                    "".join(parts[2:]),
+                    color_dict.keys(),
+                    compact,
+                    first_line,
+                )
 
         return color_dict, pixel_grid
 
-    def _parse_color(self, toml_content: str) -> dict[str, str]:
+    def stream(
+        self, file_path: Path
+    ) -> tuple[dict[str, str], Iterator[list[str]]]:
+        """
+        Parse a markdown file, reading its pixel grid one row at a time.
+
+        The frontmatter is read and parsed right away, while the rows of
+        the pixel grid are only read from the file as they are consumed,
+        so neither the file content nor the pixel grid is held in memory.
+
+        Args:
+            file_path: Path to the markdown file
+        Returns:
+            Tuple of (color_dict, rows)
+            - color_dict: mapping of number strings to hex color codes
+            - rows: iterator over the rows of the pixel grid, raising
+              ValueError on the first invalid row
+        """
+        f = open(file_path, encoding="utf-8")
+        try:
+            # Read lines until the frontmatter is wrapped in two +++
+            lines: list[str] = []
+            markers = 0
+            with metrics.stage("read"):
+                for line in f:
+                    lines.append(line)
+                    markers += line.count("+++")
+                    if markers >= 2:
+                        break
+            content = "".join(lines)
+            parts = content.split("+++", 2)
+            if len(parts) < 3:
+                raise FrontmatterError(
+                    "Markdown file must have TOML frontmatter wrapped in +++"
+                )
+
+            color_dict, encoding = self._parse_frontmatter(parts[1].strip())
+        except BaseException:
+            f.close()
+            raise
+
+        def read_lines() -> Iterator[str]:
+            with f:
+                yield parts[2].replace("+++", "")
+                for line in f:
+                    yield line.replace("+++", "")
+
+        return color_dict, self._stream_rows(
+            read_lines(), color_dict.keys(), encoding
+        )
+
+    def _stream_rows(
+        self,
+        lines: Iterable[str],
+        color_keys: Collection[str],
+        encoding: str = "csv",
+    ) -> Iterator[list[str]]:
         """
-        Parse a color definition from the TOML frontmatter.
+        Validate the rows of a pixel grid as they are read.
+
+        Args:
+            lines: Lines of CSV content
+            color_keys: The valid color keys
+            encoding: Encoding of the pixel grid, see GRID_ENCODINGS
+        Yields:
+            Each row of the pixel grid as a list of strings
+        Raises:
+            GridError: If a row uses an undefined color key
+        """
+        rows: Iterable[list[str]]
+        if encoding == "rle":
+            keys = tuple(color_keys)
+            rows = (
+                [keys[code] for code in codes]
+                for codes in self._iter_rle_rows(lines, keys)
+            )
+        else:
+            rows = self._iter_rows(lines)
+
+        total_rows = 0
+        row: list[str] = []
+        for row in rows:
+            if undefined_keys := set(row).difference(color_keys):
+                raise GridError(
+                    f"Undefined color keys in pixel grid: {undefined_keys}"
+                )
+            total_rows += 1
+            yield row
+
+        logger.info(
+            "Pixel grid size: %d rows, %d columns", total_rows, len(row)
+        )
+
+    def _parse_frontmatter(
+        self, toml_content: str
+    ) -> tuple[dict[str, str], str]:
+        """
+        Parse the TOML frontmatter.
 
         Args:
             toml_content: The TOML content as a string
         Returns:
-            A dictionary mapping keys to their hex codes
+            Tuple of (color_dict, encoding)
+            - color_dict: mapping of keys to their hex codes
+            - encoding: encoding of the pixel grid, see GRID_ENCODINGS
         Raises:
-            ValueError: If the color definition is invalid
+            FrontmatterError: If the TOML, a color definition
+                (ColorError) or the grid settings are invalid
         """
         try:
-            toml_data: dict[str, str] = tomllib.loads(toml_content)
+            with metrics.stage("toml"):
+                toml_data: dict[str, Any] = tomllib.loads(toml_content)
         except tomllib.TOMLDecodeError as e:
-            raise ValueError(f"Invalid TOML in frontmatter: {e}")
+            raise FrontmatterError(f"Invalid TOML in frontmatter: {e}")
 
+        return self._parse_color(toml_data), self._parse_encoding(toml_data)
+
+    def _parse_encoding(self, toml_data: dict[str, Any]) -> str:
+        """
+        Get the encoding of the pixel grid from the `[grid]` table.
+
+        Args:
+            toml_data: The parsed TOML frontmatter
+        Returns:
+            The encoding, "csv" unless set otherwise
+        Raises:
+            FrontmatterError: If the encoding is unknown
+        """
+        grid_settings = toml_data.get("grid")
+        if not isinstance(grid_settings, dict):
+            return "csv"
+        encoding = grid_settings.get("encoding", "csv")
+        if encoding not in GRID_ENCODINGS:
+            raise FrontmatterError(
+                f"Unknown grid encoding: {encoding!r}, "
+                f"expected one of {', '.join(GRID_ENCODINGS)}"
+            )
+        return str(encoding)
+
+    def _parse_color(self, toml_data: dict[str, Any]) -> dict[str, str]:
+        """
+        Parse the color definitions of the TOML frontmatter.
+
+        Args:
+            toml_data: The parsed TOML frontmatter
+        Returns:
+            A dictionary mapping keys to their hex codes
+        Raises:
+            ColorError: If the color definition is invalid
+        """
         # Extract color dictionary
         color_dict: dict[str, str] = {}
-        for key, color_name in toml_data.items():
-            if isinstance(color_name, str):
-                try:
-                    color_dict[key] = palette.resolve_color(color_name)
-                except ValueError as e:
-                    raise ValueError(
-                        f"Warning: {e}, "
-                        f"color definition '{key}' = '{color_name}' is invalid"
-                    )
+        with metrics.stage("resolve"):
+            for key, color_name in toml_data.items():
+                if isinstance(color_name, str):
+                    try:
+                        color_dict[key] = palette.resolve_color(color_name)
+                    except ValueError as e:
+                        raise ColorError(
+                            f"Warning: {e}, color definition "
+                            f"'{key}' = '{color_name}' is invalid"
+                        )
 
-        print(f"Found {len(color_dict)} colors:")
+        logger.info("Found %d colors", len(color_dict))
 
         return color_dict
 
     def _parse_grid(
-        self, csv_content: str, color_keys: set[str]
-    ) -> list[list[str]]:
+        self,
+        csv_content: str,
+        color_keys: Collection[str],
+        compact: bool = False,
+        first_line: int = 1,
+    ) -> list[list[str]] | PixelGrid:
         """
         Parse CSV content into a 2D list representing the pixel grid.
 
+        The cells are mapped to the codes of a PixelGrid as they are
+        scanned, see _iter_code_rows.
+
         Args:
             csv_content: The CSV content as a string
-            color_keys: A set of valid color keys
+            color_keys: The valid color keys, in the order of their codes
+            compact: Whether to build a PixelGrid instead of a 2D list
+            first_line: Line number of the first line of csv_content in
+                the markdown file, for error messages
+        Returns:
+            A 2D list of strings representing the pixel grid, or the
+            equivalent PixelGrid
+        Raises:
+            GridError: If the pixel grid is empty, uses undefined keys or
+                its rows do not have the same number of columns
+        """
+        keys = tuple(color_keys)
+        pixel_grid = PixelGrid.from_code_rows(
+            self._iter_code_rows(csv_content.split("\n"), keys, first_line),
+            keys,
+        )
+        if not pixel_grid.height:
+            raise GridError("Pixel grid is empty")
+
+        logger.info(
+            "Pixel grid size: %d rows, %d columns",
+            pixel_grid.height,
+            pixel_grid.width,
+        )
+
+        return pixel_grid if compact else pixel_grid.tolist()
+
+    def _iter_code_rows(
+        self, lines: Iterable[str], keys: Sequence[str], first_line: int = 1
+    ) -> Iterator[array]:
+        """
+        Scan lines of CSV content into rows of key codes.
+
+        Lines made of single ASCII character keys separated by bare
+        commas, the usual shape of a pixel grid, are checked and mapped
+        to codes as a whole with bytes.translate, without a string per
+        cell. Any other line is split and stripped cell by cell. Empty
+        lines and "#" comments are skipped.
+
+        Args:
+            lines: Lines of CSV content
+            keys: The valid color keys, in the order of their codes
+            first_line: Line number of the first line, for error messages
+        Yields:
+            Each row of the pixel grid as an array of codes into ``keys``
+        Raises:
+            GridError: On the first undefined key or row whose number of
+                columns differs from the first row, with its line number
+        """
+        codebook = {key: code for code, key in enumerate(keys)}
+        typecode = typecode_for(len(keys))
+
+        # Translation of the keys eligible to the fast path to their code
+        fast_keys = {
+            key: code
+            for key, code in codebook.items()
+            if len(key) == 1
+            and key.isascii()
+            and not (key.isspace() or key == ",")
+        }
+        fast = typecode == "B" and bool(fast_keys)
+        table = bytearray(range(256))
+        for key, key_code in fast_keys.items():
+            table[ord(key)] = key_code
+        defined = "".join(fast_keys).encode("ascii")
+
+        total_cols: int | None = None
+        separators = ""
+        for line_number, line in enumerate(lines, first_line):
+            line = line.strip()
+
+            # Skip empty lines or comments
+            if not line or line[0] == "#":
+                continue
+
+            if fast and line.isascii():
+                if total_cols is None:
+                    separators = "," * (len(line) // 2)
+                if (
+                    len(line) == 2 * len(separators) + 1
+                    and line[1::2] == separators
+                ):
+                    data = line[::2].encode("ascii")
+                    # Only undefined keys are left once defined ones are
+                    # deleted
+                    if not data.translate(None, defined):
+                        total_cols = len(data)
+                        yield array(typecode, data.translate(table))
+                        continue
+
+            # Split by comma, checking each cleaned up cell
+            cells = line.split(",")
+            if total_cols is None:
+                total_cols = len(cells)
+                separators = "," * (total_cols - 1)
+            elif len(cells) != total_cols:
+                raise GridError(
+                    f"Inconsistent number of columns in pixel grid: "
+                    f"expected {total_cols}, found {len(cells)} "
+                    f"at line {line_number}"
+                )
+            row = array(typecode)
+            for column, cell in enumerate(cells, 1):
+                code = codebook.get(key := cell.strip())
+                if code is None:
+                    raise GridError(
+                        f"Undefined color keys in pixel grid: {{{key!r}}} "
+                        f"at line {line_number}, column {column}"
+                    )
+                row.append(code)
+            yield row
+
+    def _parse_rle_grid(
+        self,
+        rle_content: str,
+        color_keys: Collection[str],
+        compact: bool = False,
+    ) -> list[list[str]] | PixelGrid:
+        """
+        Parse run-length encoded content into the pixel grid.
+
+        The runs are expanded straight into the codes of a PixelGrid,
+        without building a string per cell.
+
+        Args:
+            rle_content: The run-length encoded content as a string
+            color_keys: The valid color keys, in the order of their codes
+            compact: Whether to return a PixelGrid instead of a 2D list
         Returns:
-            A 2D list of strings representing the pixel grid
+            A 2D list of strings representing the pixel grid, or the
+            equivalent PixelGrid
+        Raises:
+            GridError: If the pixel grid is empty
         """
-        pixel_grid: list[list[str]] = []
-        keys: set[str] = set()
+        keys = tuple(color_keys)
+        pixel_grid = PixelGrid.from_code_rows(
+            self._iter_rle_rows(rle_content.split("\n"), keys), keys
+        )
+        if not pixel_grid.height:
+            raise GridError("Pixel grid is empty")
+
+        logger.info(
+            "Pixel grid size: %d rows, %d columns",
+            pixel_grid.height,
+            pixel_grid.width,
+        )
 
+        return pixel_grid if compact else pixel_grid.tolist()
+
+    def _iter_rle_rows(
+        self, lines: Iterable[str], keys: Sequence[str]
+    ) -> Iterator[array]:
+        """
+        Expand lines of run-length encoded content into rows of key codes.
+
+        Each line is a comma-separated row where a cell "KEY*N" stands
+        for N cells of KEY, and a line "*N" repeats the previous row N
+        more times. Empty lines and "#" comments are skipped.
+
+        Args:
+            lines: Lines of run-length encoded content
+            keys: The valid color keys, in the order of their codes
+        Yields:
+            Each row of the pixel grid as an array of codes into
+            ``keys``; repeated rows are the same array
+        Raises:
+            GridError: If a key is undefined, a run-length is invalid, a
+                row is repeated before the first row, or the rows do not
+                have the same number of columns
+        """
+        codebook = {key: code for code, key in enumerate(keys)}
+        typecode = typecode_for(len(keys))
+        # Single cell of each code, repeated into runs
+        cells = [array(typecode, (code,)) for code in range(len(keys))]
         total_cols = None
-        for line in csv_content.split("\n"):
+        row: array | None = None
+        for line in lines:
             line = line.strip()
 
             # Skip empty lines or comments
             if not line or line[0] == "#":
                 continue
 
-            # Split by comma and clean up each cell
-            row = [cell.strip() for cell in line.split(",")]
+            # Repeat the previous row
+            if line[0] == "*":
+                if row is None:
+                    raise GridError(
+                        f"Repeated row before the first row: '{line}'"
+                    )
+                for _ in range(self._run_length(line[1:], line)):
+                    yield row
+                continue
 
-            # Add all keys in this row to the set of keys found
-            keys.update(row)
+            row = array(typecode)
+            for cell in line.split(","):
+                key, run, count = cell.partition("*")
+                code = codebook.get(key := key.strip())
+                if code is None:
+                    raise GridError(
+                        f"Undefined color keys in pixel grid: {{{key!r}}}"
+                    )
+                if run:
+                    row += cells[code] * self._run_length(count, cell)
+                else:
+                    row.append(code)
 
             if total_cols is None:
                 total_cols = len(row)
             elif len(row) != total_cols:
-                raise ValueError(
+                raise GridError(
                     f"Inconsistent number of columns in pixel grid: "
                     f"expected {total_cols}, found {len(row)}"
                 )
 
-            pixel_grid.append(row)
+            yield row
 
-        # Validate that all keys in the grid are already defined
-        if undefined_keys := keys - color_keys:
-            raise ValueError(
-                f"Undefined color keys in pixel grid: {undefined_keys}"
-            )
+    @staticmethod
+    def _run_length(count: str, cell: str) -> int:
+        """
+        Parse the number of repetitions of a run.
 
-        print(
-            f"Pixel grid size: "
-            f"{len(pixel_grid)} rows, {len(pixel_grid[0])} columns"
-        )
+        Args:
+            count: The number after "*"
+            cell: The whole cell or line, for the error message
+        Returns:
+            The number of repetitions
+        Raises:
+            GridError: If the number is not a positive integer
+        """
+        # Only plain digits, as int() also takes signs, spaces and "_"
+        if count.isascii() and count.isdigit():
+            repetitions = int(count)
+        else:
+            repetitions = 0
+        if repetitions < 1:
+            raise GridError(f"Invalid run-length in pixel grid: '{cell}'")
+        return repetitions
+
+    def _iter_rows(self, lines: Iterable[str]) -> Iterator[list[str]]:
+        """
+        Split lines of CSV content into rows of color keys.
+
+        Args:
+            lines: Lines of CSV content
+        Yields:
+            Each row of the pixel grid as a list of strings
+        Raises:
+            GridError: If the rows do not have the same number of columns
+        """
+        total_cols = None
+        for line in lines:
+            line = line.strip()
+
+            # Skip empty lines or comments
+            if not line or line[0] == "#":
+                continue
+
+            # Split by comma and clean up each cell
+            row = [cell.strip() for cell in line.split(",")]
+
+            if total_cols is None:
+                total_cols = len(row)
+            elif len(row) != total_cols:
+                raise GridError(
+                    f"Inconsistent number of columns in pixel grid: "
+                    f"expected {total_cols}, found {len(row)}"
+                )
 
-        return pixel_grid
+            yield row
@@ -2,59 +2,810 @@
 Handles file and folder operations.
 """
 
+import io
+import logging
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence, Sized
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
+from logging.handlers import QueueHandler
 from pathlib import Path
+from queue import SimpleQueue
 
+from PIL import Image
+
+from pixelate import metrics
+from pixelate.cache import BuildCache, Fingerprint, RenderCache
+from pixelate.console import LOGGER_NAME
+from pixelate.errors import OutputFormatError
 from pixelate.generator import ImageGenerator
+from pixelate.grid import PixelGrid
+from pixelate.metrics import Metrics, StageRecord
 from pixelate.parser import PixelArtParser
+from pixelate.utility.files import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+# Formats storing several sizes of an image in a single file
+MULTI_SIZE_FORMATS = frozenset({"ico"})
+
+# Formats storing palette-indexed images with the alpha of each color
+INDEXED_FORMATS = frozenset({"png"})
 
 
 class Pixelator:
     """Handles pixel art processing."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        stream: bool = False,
+        metrics: Metrics | None = None,
+        render_cache: RenderCache | None = None,
+    ) -> None:
+        """
+        Initialize the pixelator.
+
+        Args:
+            stream: Whether to read pixel grids one row at a time instead
+                of loading them whole, to reduce memory on huge grids
+            metrics: Optional metrics recording the time and memory spent
+                in each stage of processing each file
+            render_cache: Cache of encoded images reused by identical
+                renders (default: a cache in memory only)
+        """
         self._parser = PixelArtParser()
         self._generator = ImageGenerator()
+        self._stream = stream
+        self._metrics = metrics
+        self._render_cache = render_cache or RenderCache()
+
+    @property
+    def metrics(self) -> Metrics | None:
+        """Return the metrics recorded while processing, if any."""
+        return self._metrics
+
+    @property
+    def render_cache(self) -> RenderCache:
+        """Return the cache of encoded images."""
+        return self._render_cache
+
+    @staticmethod
+    def output_path(
+        markdown_file: Path,
+        output_dir: Path | None,
+        format: str,
+        pixel_size: int | None = None,
+    ) -> Path:
+        """
+        Get the path of the image generated from a markdown file.
+
+        Args:
+            markdown_file: Path to the markdown file
+            output_dir: Optional path to the output directory
+            format: Output image format (e.g., "png", "ico")
+            pixel_size: Pixel size to add to the name, when several sizes
+                are generated
+        Returns:
+            The output path, named after the markdown file
+        """
+        # Generate output filename with same name as markdown file
+        output_filename = markdown_file.stem
+        if pixel_size is not None:
+            output_filename += f"-{pixel_size}"
+        output_filename += f".{format}"
+        if output_dir is None:
+            output_dir = markdown_file.parent
+        return output_dir / output_filename
+
+    def outputs(
+        self,
+        markdown_file: Path,
+        output_dir: Path | None,
+        pixel_size: int | Sequence[int],
+        format: str | Sequence[str],
+    ) -> list[tuple[Path, str, tuple[int, ...]]]:
+        """
+        List the images generated from a markdown file.
+
+        A single pixel size gives one image per format. Several pixel
+        sizes give one image per size and format, named with their size,
+        except for ICO files which hold every size in one file.
+
+        Args:
+            markdown_file: Path to the markdown file
+            output_dir: Optional path to the output directory
+            pixel_size: Size, or sizes, of each pixel in the output images
+            format: Output image format, or formats
+        Returns:
+            List of (output_path, format, pixel_sizes) for each image
+        """
+        pixel_sizes, formats = _pixel_sizes(pixel_size), _formats(format)
+        outputs: list[tuple[Path, str, tuple[int, ...]]] = []
+        for format in formats:
+            if len(pixel_sizes) == 1 or format.lower() in MULTI_SIZE_FORMATS:
+                outputs.append(
+                    (
+                        self.output_path(markdown_file, output_dir, format),
+                        format,
+                        pixel_sizes,
+                    )
+                )
+                continue
+            for size in pixel_sizes:
+                outputs.append(
+                    (
+                        self.output_path(
+                            markdown_file, output_dir, format, size
+                        ),
+                        format,
+                        (size,),
+                    )
+                )
+        return outputs
 
     def process(
         self,
         markdown_file: Path,
         output_dir: Path | None = None,
-        pixel_size: int = 10,
-        format: str = "png",
+        pixel_size: int | Sequence[int] = 10,
+        format: str | Sequence[str] = "png",
+        cache: BuildCache | None = None,
+        force: bool = False,
+        indexed: bool = False,
+    ) -> bool:
+        """
+        Process a single markdown file and generate its images.
+
+        Args:
+            markdown_file: Path to the markdown file to process
+            output_dir: Optional path to the output directory
+            pixel_size: Size, or sizes, of each pixel in the output images
+            format: Output image format (e.g., "png", "ico"), or formats
+            cache: Optional build cache used to skip up-to-date outputs
+            force: Whether to render even if the output is up to date
+            indexed: Whether to write palette-indexed images, see
+                ImageGenerator.generate_sizes
+        Returns:
+            Whether the images are up to date or were generated
+            successfully; errors are reported and do not propagate
+        """
+        pixel_sizes, formats = _pixel_sizes(pixel_size), _formats(format)
+        if self._is_current(
+            cache,
+            force,
+            markdown_file,
+            output_dir,
+            pixel_sizes,
+            formats,
+            indexed,
+        ):
+            return True
+
+        fingerprint = cache.fingerprint(markdown_file) if cache else None
+        success = self._process(
+            markdown_file, output_dir, pixel_sizes, formats, indexed
+        )
+        if success and cache is not None and fingerprint is not None:
+            self._record(
+                cache,
+                markdown_file,
+                fingerprint,
+                output_dir,
+                pixel_sizes,
+                formats,
+                indexed,
+            )
+        return success
+
+    def _is_current(
+        self,
+        cache: BuildCache | None,
+        force: bool,
+        markdown_file: Path,
+        output_dir: Path | None,
+        pixel_sizes: tuple[int, ...],
+        formats: tuple[str, ...],
+        indexed: bool = False,
+    ) -> bool:
+        """
+        Check the build cache for up-to-date outputs, and report it.
+
+        Args:
+            cache: Optional build cache
+            force: Whether to ignore the build cache
+            markdown_file: Path to the markdown file to process
+            output_dir: Optional path to the output directory
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats
+            indexed: Whether the images are palette-indexed
+        Returns:
+            Whether the outputs are up to date and can be skipped
+        """
+        if cache is None or force:
+            return False
+        output_paths = [
+            output_path
+            for output_path, _, _ in self.outputs(
+                markdown_file, output_dir, pixel_sizes, formats
+            )
+        ]
+        if not cache.is_current(
+            markdown_file, output_paths, pixel_sizes, formats, indexed
+        ):
+            return False
+        logger.info("Skipping up-to-date file: %s", markdown_file)
+        return True
+
+    def _record(
+        self,
+        cache: BuildCache,
+        markdown_file: Path,
+        fingerprint: Fingerprint,
+        output_dir: Path | None,
+        pixel_sizes: tuple[int, ...],
+        formats: tuple[str, ...],
+        indexed: bool = False,
     ) -> None:
         """
-        Process a single markdown file and generate its image.
+        Record the outputs of a markdown file in the build cache.
+
+        Args:
+            cache: The build cache
+            markdown_file: Path to the processed markdown file
+            fingerprint: State of the markdown file before processing
+            output_dir: Optional path to the output directory
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats
+            indexed: Whether the images are palette-indexed
+        """
+        output_paths = [
+            output_path
+            for output_path, _, _ in self.outputs(
+                markdown_file, output_dir, pixel_sizes, formats
+            )
+        ]
+        cache.record(
+            markdown_file,
+            fingerprint,
+            output_paths,
+            pixel_sizes,
+            formats,
+            indexed,
+        )
+
+    def _process(
+        self,
+        markdown_file: Path,
+        output_dir: Path | None,
+        pixel_sizes: tuple[int, ...],
+        formats: tuple[str, ...],
+        indexed: bool = False,
+    ) -> bool:
+        """
+        Parse a markdown file once and save its images.
+
+        The pixel grid is packed once, every pixel size is scaled up from
+        it, and every format is encoded from the scaled images.
 
         Args:
             markdown_file: Path to the markdown file to process
             output_dir: Optional path to the output directory
-            pixel_size: Size of each pixel in the output image
-            format: Output image format (e.g., "png", "ico")
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats (e.g., "png", "ico")
+            indexed: Whether to write palette-indexed images
+        Returns:
+            Whether the images were generated successfully
+        """
+        with self._recording(markdown_file):
+            return self._render(
+                markdown_file, output_dir, pixel_sizes, formats, indexed
+            )
+
+    def _recording(self, markdown_file: Path) -> AbstractContextManager[None]:
+        """
+        Record the stages of processing a file, if metrics are recorded.
+
+        Args:
+            markdown_file: Path to the markdown file to process
+        Returns:
+            Context manager recording the stages
+        """
+        if self._metrics is None:
+            return nullcontext()
+        return self._metrics.file(markdown_file)
+
+    def _render(
+        self,
+        markdown_file: Path,
+        output_dir: Path | None,
+        pixel_sizes: tuple[int, ...],
+        formats: tuple[str, ...],
+        indexed: bool = False,
+    ) -> bool:
+        """
+        Render and save the images of a markdown file, see _process.
+
+        Args:
+            markdown_file: Path to the markdown file to process
+            output_dir: Optional path to the output directory
+            pixel_sizes: Sizes of each pixel in the output images
+            formats: Output image formats (e.g., "png", "ico")
+            indexed: Whether to write palette-indexed images
         Returns:
-            None
-        Raises:
-            Exception: If any error occurs during processing
+            Whether the images were generated successfully
         """
         try:
-            print(f"Processing file: {markdown_file}")
+            logger.info("Processing file: %s", markdown_file)
+            color_dict, pixel_grid = self._parse(markdown_file)
+            # Images are only generated if an output is not cached
+            images: dict[int, Image.Image] = {}
+
+            for output_path, format, sizes in self.outputs(
+                markdown_file, output_dir, pixel_sizes, formats
+            ):
+                # Reuse the encoding of an identical render, if any
+                key = self._render_cache.key(
+                    color_dict, pixel_grid, sizes, format, indexed
+                )
+                data = self._render_cache.get(key) if key else None
+                if data is None and not images:
+                    images = self._generate(
+                        color_dict, pixel_grid, pixel_sizes, indexed
+                    )
+
+                # Encode the image in memory, then replace the file at once
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                with metrics.stage("encode"):
+                    if data is None:
+                        data = encode([images[size] for size in sizes], format)
+                        if key:
+                            self._render_cache.put(key, data)
+                    written = write_if_changed(output_path, data)
+                if written:
+                    logger.info("Pixel icon saved to: %s", output_path)
+                else:
+                    logger.info("Pixel icon unchanged: %s", output_path)
+            return True
+
+        except Exception as e:
+            logger.error("Failed to process %s: %s", markdown_file, e)
+            return False
+
+    def render(
+        self, markdown_file: Path, pixel_size: int = 10
+    ) -> Image.Image | None:
+        """
+        Render the image of a markdown file without saving it.
+
+        Args:
+            markdown_file: Path to the markdown file to render
+            pixel_size: Size of each pixel in the image
+        Returns:
+            The rendered image, or None if it could not be rendered;
+            errors are reported and do not propagate
+        """
+        with self._recording(markdown_file):
+            try:
+                logger.info("Processing file: %s", markdown_file)
+                color_dict, pixel_grid = self._parse(markdown_file)
+                return self._generate(color_dict, pixel_grid, (pixel_size,))[
+                    pixel_size
+                ]
+            except Exception as e:
+                logger.error("Failed to process %s: %s", markdown_file, e)
+                return None
 
-            # Parse the markdown file
-            color_dict, pixel_grid = self._parser.parse(markdown_file)
+    def _parse(
+        self, markdown_file: Path
+    ) -> tuple[dict[str, str], Iterable[list[str]] | PixelGrid]:
+        """
+        Parse a markdown file.
+
+        Args:
+            markdown_file: Path to the markdown file
+        Returns:
+            Tuple of (color_dict, pixel_grid), the pixel grid being an
+            iterator over its rows when streaming
+        """
+        if self._stream:
+            # Parse the pixel grid row by row while generating
+            return self._parser.stream(markdown_file)
+        return self._parser.parse(markdown_file, compact=True)
 
-            # Generate the pixel image
-            image = self._generator.generate(
-                color_dict, pixel_grid, pixel_size
+    def _generate(
+        self,
+        color_dict: dict[str, str],
+        pixel_grid: Iterable[list[str]] | PixelGrid,
+        pixel_sizes: tuple[int, ...],
+        indexed: bool = False,
+    ) -> dict[int, Image.Image]:
+        """
+        Generate the images of a parsed pixel grid.
+
+        Args:
+            color_dict: Mapping of color keys to hex color codes
+            pixel_grid: The pixel grid, see _parse
+            pixel_sizes: Sizes of each pixel in the images
+            indexed: Whether to generate palette-indexed images
+        Returns:
+            Mapping of pixel sizes to the generated images
+        """
+        with metrics.stage("render"):
+            return dict(
+                zip(
+                    pixel_sizes,
+                    self._generator.generate_sizes(
+                        color_dict, pixel_grid, pixel_sizes, indexed
+                    ),
+                )
             )
 
-            # Generate output filename with same name as markdown file
-            output_filename = markdown_file.stem + f".{format}"
-            if output_dir is None:
-                output_dir = markdown_file.parent
-            output_path = output_dir / output_filename
+    def process_many(
+        self,
+        markdown_files: Iterable[Path],
+        output_dir: Path | None = None,
+        pixel_size: int | Sequence[int] = 10,
+        format: str | Sequence[str] = "png",
+        jobs: int | None = None,
+        cache: BuildCache | None = None,
+        force: bool = False,
+        source_root: Path | None = None,
+        indexed: bool = False,
+    ) -> list[bool]:
+        """
+        Process several markdown files, spreading them over processes.
+
+        Files are handed to the workers as they come from
+        ``markdown_files``, which may be a lazy iterator over a folder
+        tree. Each worker process keeps its own Pixelator for all the
+        files it handles. The output of every file is reported in the
+        order of ``markdown_files``, whichever worker finishes first.
+
+        Args:
+            markdown_files: Paths to the markdown files to process
+            output_dir: Optional path to the output directory
+            pixel_size: Size, or sizes, of each pixel in the output images
+            format: Output image format (e.g., "png", "ico"), or formats
+            jobs: Number of worker processes (default: CPU count)
+            cache: Optional build cache used to skip up-to-date outputs
+            force: Whether to render even if the outputs are up to date
+            source_root: Optional folder of the markdown files, whose
+                structure is mirrored under ``output_dir``
+            indexed: Whether to write palette-indexed images, see
+                ImageGenerator.generate_sizes
+        Returns:
+            Whether each image is up to date or was generated
+            successfully, in order
+        """
+        pixel_sizes, formats = _pixel_sizes(pixel_size), _formats(format)
+        results: list[bool] = []
+
+        # (index, markdown_file, file_output_dir, fingerprint)
+        Pending = tuple[int, Path, Path | None, Fingerprint | None]
+
+        def pending() -> Iterator[Pending]:
+            # Up-to-date files are skipped before reaching the workers
+            for markdown_file in markdown_files:
+                file_output_dir = mirrored_output_dir(
+                    markdown_file, output_dir, source_root
+                )
+                results.append(True)
+                if not self._is_current(
+                    cache,
+                    force,
+                    markdown_file,
+                    file_output_dir,
+                    pixel_sizes,
+                    formats,
+                    indexed,
+                ):
+                    yield (
+                        len(results) - 1,
+                        markdown_file,
+                        file_output_dir,
+                        cache.fingerprint(markdown_file) if cache else None,
+                    )
+
+        def done(file: Pending, success: bool) -> None:
+            index, markdown_file, file_output_dir, fingerprint = file
+            results[index] = success
+            if success and cache is not None and fingerprint is not None:
+                self._record(
+                    cache,
+                    markdown_file,
+                    fingerprint,
+                    file_output_dir,
+                    pixel_sizes,
+                    formats,
+                    indexed,
+                )
+
+        jobs = jobs or os.cpu_count() or 1
+        if isinstance(markdown_files, Sized):
+            jobs = min(jobs, len(markdown_files))
+        if jobs <= 1:
+            for file in pending():
+                _, markdown_file, file_output_dir, _ = file
+                success = self._process(
+                    markdown_file,
+                    file_output_dir,
+                    pixel_sizes,
+                    formats,
+                    indexed,
+                )
+                done(file, success)
+            return results
 
-            # Save the image
-            image.save(output_path, format.upper())
-            print(f"Pixel icon saved to: {output_path}")
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(
+                self._stream,
+                self._metrics is not None,
+                self._metrics is not None and self._metrics.trace_memory,
+                logging.getLogger(LOGGER_NAME).getEffectiveLevel(),
+                self._render_cache.directory,
+            ),
+        ) as executor:
+            submitted: deque[tuple[Pending, Future[_WorkerResult]]] = deque()
+            for file in pending():
+                _, markdown_file, file_output_dir, _ = file
+                submitted.append(
+                    (
+                        file,
+                        executor.submit(
+                            _process_in_worker,
+                            markdown_file,
+                            file_output_dir,
+                            pixel_sizes,
+                            formats,
+                            indexed,
+                        ),
+                    )
+                )
+                # Report the files finished so far, in order
+                while submitted and submitted[0][1].done():
+                    file, future = submitted.popleft()
+                    success = self._collect(file[1], future)
+                    done(file, success)
 
+            for file, future in submitted:
+                success = self._collect(file[1], future)
+                done(file, success)
+
+        return results
+
+    def _collect(
+        self, markdown_file: Path, future: "Future[_WorkerResult]"
+    ) -> bool:
+        """
+        Wait for a file processed by a worker, and report its output.
+
+        Args:
+            markdown_file: Path to the processed markdown file
+            future: The result of _process_in_worker
+        Returns:
+            Whether the images were generated successfully
+        """
+        try:
+            success, log_records, records, (hits, misses) = future.result()
         except Exception as e:
-            print(f"Error processing {markdown_file}: {e}")
+            logger.error("Failed to process %s: %s", markdown_file, e)
+            return False
+        self._render_cache.hits += hits
+        self._render_cache.misses += misses
+        for log_record in log_records:
+            logging.getLogger(log_record.name).handle(log_record)
+        if self._metrics is not None:
+            self._metrics.extend(records)
+        return success
+
+
+def encode(images: Sequence[Image.Image], format: str) -> bytes:
+    """
+    Encode images into a file, as one multi-size container if needed.
+
+    Palette-indexed images are converted to RGBA for the formats that
+    cannot keep the alpha of their colors, see _storable.
+
+    Args:
+        images: Images to encode, of different sizes
+        format: Image format (e.g., "png", "ico")
+    Returns:
+        The content of the image file
+    Raises:
+        OutputFormatError: If the format is unknown, cannot hold several
+            images, or cannot store the mode of the images
+    """
+    Image.init()
+    if format.upper() not in Image.SAVE:
+        raise OutputFormatError(f"Unknown image format: '{format}'")
+    if len(images) > 1 and format.lower() not in MULTI_SIZE_FORMATS:
+        raise OutputFormatError(
+            f"Format '{format}' cannot hold several pixel sizes"
+        )
+
+    images = [_storable(image, format.lower()) for image in images]
+    buffer = io.BytesIO()
+    try:
+        if len(images) == 1:
+            images[0].save(buffer, format.upper())
+            return buffer.getvalue()
+
+        # The largest image is saved along with the exact smaller ones
+        largest = max(images, key=lambda image: image.width)
+        largest.save(
+            buffer,
+            format.upper(),
+            sizes=[image.size for image in images],
+            append_images=[image for image in images if image is not largest],
+        )
+    except OSError as e:
+        # Such as the formats without transparency, e.g. JPEG
+        raise OutputFormatError(
+            f"Format '{format}' cannot store the images: {e}"
+        ) from e
+    return buffer.getvalue()
+
+
+def _storable(image: Image.Image, format: str) -> Image.Image:
+    """
+    Get an image that a format can store without losing transparency.
+
+    Args:
+        image: Image to encode
+        format: Lowercase image format
+    Returns:
+        The image itself, unless it is palette-indexed and the format
+        cannot store the alpha of its colors, in which case an RGBA copy
+    """
+    if image.mode != "P" or format in INDEXED_FORMATS:
+        return image
+    # GIF only has one fully transparent color, first in the palette
+    transparency = image.info.get("transparency", b"")
+    if format == "gif" and transparency in (b"", b"\x00"):
+        # Built again, as converting an image with the alpha of its colors
+        # leaves an RGBA palette that the GIF encoder misreads
+        gif_image = Image.frombytes("P", image.size, image.tobytes())
+        gif_image.putpalette(image.getpalette() or [])
+        if transparency:
+            gif_image.info["transparency"] = 0
+        return gif_image
+    return image.convert("RGBA")
+
+
+def mirrored_output_dir(
+    markdown_file: Path, output_dir: Path | None, source_root: Path | None
+) -> Path | None:
+    """
+    Get the output directory of a file, mirroring its source folder.
+
+    Args:
+        markdown_file: Path to the markdown file
+        output_dir: Optional path to the output directory
+        source_root: Optional folder whose structure is mirrored under
+            ``output_dir``
+    Returns:
+        The folder of ``markdown_file`` relative to ``source_root``, under
+        ``output_dir``, or ``output_dir`` itself without a source root
+    """
+    if output_dir is None or source_root is None:
+        return output_dir
+    return output_dir / markdown_file.parent.relative_to(source_root)
+
+
+# Result of a worker process: (success, log_records, records, cache_stats)
+_WorkerResult = tuple[
+    bool, list[logging.LogRecord], list[StageRecord], tuple[int, int]
+]
+
+
+# Pixelator of the current worker process, see Pixelator.process_many
+_worker_pixelator: Pixelator | None = None
+
+# Log records of the current worker process, sent back to the main process
+_worker_logs: SimpleQueue[logging.LogRecord] = SimpleQueue()
+
+
+def _init_worker(
+    stream: bool = False,
+    profile: bool = False,
+    trace_memory: bool = False,
+    log_level: int = logging.INFO,
+    render_cache_dir: Path | None = None,
+) -> None:
+    """
+    Create the Pixelator reused by a worker process.
+
+    Args:
+        stream: Whether the Pixelator reads pixel grids row by row
+        profile: Whether the Pixelator records metrics
+        trace_memory: Whether the metrics record the peak memory
+        log_level: Level of the messages sent back to the main process
+        render_cache_dir: Optional directory of the render cache, shared
+            with the other workers
+    """
+    global _worker_pixelator
+    _worker_pixelator = Pixelator(
+        stream,
+        Metrics(trace_memory) if profile else None,
+        RenderCache(render_cache_dir),
+    )
+
+    # Collect messages instead of writing them, see _process_in_worker
+    package_logger = logging.getLogger(LOGGER_NAME)
+    package_logger.handlers = [QueueHandler(_worker_logs)]
+    package_logger.setLevel(log_level)
+    package_logger.propagate = False
+
+
+def _process_in_worker(
+    markdown_file: Path,
+    output_dir: Path | None,
+    pixel_sizes: tuple[int, ...],
+    formats: tuple[str, ...],
+    indexed: bool = False,
+) -> _WorkerResult:
+    """
+    Process a markdown file inside a worker process.
+
+    Args:
+        markdown_file: Path to the markdown file to process
+        output_dir: Optional path to the output directory
+        pixel_sizes: Sizes of each pixel in the output images
+        formats: Output image formats (e.g., "png", "ico")
+        indexed: Whether to write palette-indexed images
+    Returns:
+        Tuple of (success, log_records, records, cache_stats)
+        - success: whether the image was generated successfully
+        - log_records: the messages logged while processing, to be
+          handled by the main process
+        - records: the metrics recorded while processing, if any
+        - cache_stats: the (hits, misses) of the render cache while
+          processing
+    """
+    if _worker_pixelator is None:
+        _init_worker()
+    assert _worker_pixelator is not None
+
+    render_cache = _worker_pixelator.render_cache
+    hits, misses = render_cache.hits, render_cache.misses
+    success = _worker_pixelator._process(
+        markdown_file, output_dir, pixel_sizes, formats, indexed
+    )
+    log_records: list[logging.LogRecord] = []
+    while not _worker_logs.empty():
+        log_records.append(_worker_logs.get())
+    worker_metrics = _worker_pixelator.metrics
+    records = worker_metrics.drain() if worker_metrics is not None else []
+    cache_stats = (render_cache.hits - hits, render_cache.misses - misses)
+    return success, log_records, records, cache_stats
+
+
+def _pixel_sizes(pixel_size: int | Sequence[int]) -> tuple[int, ...]:
+    """
+    Normalize one or several pixel sizes, dropping duplicates.
+
+    Args:
+        pixel_size: Size, or sizes, of each pixel in the output images
+    Returns:
+        The distinct pixel sizes, in order
+    """
+    if isinstance(pixel_size, int):
+        return (pixel_size,)
+    return tuple(dict.fromkeys(pixel_size))
+
+
+def _formats(format: str | Sequence[str]) -> tuple[str, ...]:
+    """
+    Normalize one or several output formats, dropping duplicates.
+
+    Args:
+        format: Output image format, or formats
+    Returns:
+        The distinct output formats, in order
+    """
+    if isinstance(format, str):
+        return (format,)
+    return tuple(dict.fromkeys(format))
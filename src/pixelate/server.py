@@ -0,0 +1,167 @@
+"""
+Handles serving renders from a long-running process over a Unix socket.
+
+A server keeps a PixelateApp, with its Pillow modules and palettes loaded,
+and handles one request at a time, see pixelate.client for the protocol.
+"""
+
+import base64
+import json
+import logging
+import os
+import socketserver
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pixelate.api import render
+from pixelate.client import package_version
+from pixelate.console import LOGGER_NAME, ConsoleFormatter
+
+if TYPE_CHECKING:
+    from pixelate.app import PixelateApp
+
+
+class _CaptureHandler(logging.Handler):
+    """Collects the formatted messages of a request."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(self.format(record))
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles a connection carrying a single request."""
+
+    server: "RenderServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            response = self.server.respond(json.loads(line))
+        except Exception as e:
+            response = {
+                "status": 1,
+                "error": str(e),
+                "messages": [f"Error: {e}"],
+            }
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class RenderServer(socketserver.UnixStreamServer):
+    """
+    Serves the requests of pixelate clients over a Unix domain socket.
+
+    Requests are handled one at a time, each run from the current
+    directory of its client, with its console output sent back to it.
+    """
+
+    def __init__(self, socket_path: Path, app: "PixelateApp") -> None:
+        """
+        Initialize the server, listening on a new socket.
+
+        Args:
+            socket_path: Path of the socket, which must not exist
+            app: The application handling the requests
+        """
+        self._app = app
+        self._version = package_version()
+        # Only the user running the server may send requests, from the
+        # moment the socket is created
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def respond(self, message: dict[str, Any]) -> dict[str, Any]:
+        """
+        Handle a request.
+
+        The messages logged while handling the request are sent back to
+        the client, instead of written to the console of the server.
+        Requests of clients of another version are refused, except pings,
+        so that an upgrade is not rendered with the code of a server left
+        running.
+
+        Args:
+            message: The request, with its "command", the "version" of the
+                client, and whether to be "quiet" (only reporting warnings
+                and errors)
+        Returns:
+            The response, with its "status" (0 on success), "messages" and
+            the "version" of the server
+        Raises:
+            ValueError: If the command is unknown
+        """
+        handler = _CaptureHandler()
+        handler.setFormatter(ConsoleFormatter())
+        package_logger = logging.getLogger(LOGGER_NAME)
+        handlers, level = package_logger.handlers, package_logger.level
+        package_logger.handlers = [handler]
+        package_logger.setLevel(
+            logging.WARNING if message.get("quiet") else logging.INFO
+        )
+        try:
+            command = message.get("command")
+            if command == "ping":
+                response: dict[str, Any] = {"status": 0}
+            elif (version := message.get("version")) != self._version:
+                error = (
+                    f"The server runs pixelate {self._version}, "
+                    f"restart it to use pixelate {version}"
+                )
+                response = {"status": 1, "error": error}
+            elif command == "run":
+                response = self._run(message)
+            elif command == "render":
+                response = self._render(message)
+            else:
+                raise ValueError(f"Unknown command: {command!r}")
+        finally:
+            package_logger.handlers = handlers
+            package_logger.setLevel(level)
+        response["messages"] = handler.messages
+        response["version"] = self._version
+        return response
+
+    def _run(self, message: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run the application as the command line would, see client.run.
+
+        Args:
+            message: The request, with the "cwd" of the client and the
+                "args" of PixelateApp.run
+        Returns:
+            The response, with the exit "status"
+        """
+        cwd = os.getcwd()
+        try:
+            os.chdir(message["cwd"])
+            self._app.run(**message["args"])
+        except SystemExit as e:
+            return {"status": e.code if isinstance(e.code, int) else 1}
+        finally:
+            os.chdir(cwd)
+        return {"status": 0}
+
+    def _render(self, message: dict[str, Any]) -> dict[str, Any]:
+        """
+        Render markdown content, or a markdown file, see client.render.
+
+        Args:
+            message: The request, with the markdown "text" or "path", the
+                "pixel_size" list and the "format"
+        Returns:
+            The response, with the base64 encoded image "data"
+        """
+        if "path" in message:
+            text = Path(message["path"]).read_text(encoding="utf-8")
+        else:
+            text = message["text"]
+        data = render(text, message["pixel_size"], message["format"])
+        return {"status": 0, "data": base64.b64encode(data).decode("ascii")}
@@ -1,3 +1,6 @@
+from collections.abc import Iterable, Mapping
+
+
 class BiDict:
     """
     A bidirectional dictionary that lookups from key to value and value to key.
@@ -8,17 +11,81 @@ class BiDict:
         self._dictionary: dict[str, str] = {}
         self._keys: set[str] = set()
         self._values: set[str] = set()
-        for key, value in kwargs.items():
-            self[key] = value
+        self.update(kwargs)
 
-    def __setitem__(self, key: str, value: str) -> None:
-        if key in self._dictionary or value in self._dictionary.values():
+    @classmethod
+    def from_items(
+        cls, items: Mapping[str, str] | Iterable[tuple[str, str]]
+    ) -> "BiDict":
+        """
+        Create a bidirectional dictionary from key-value pairs.
+
+        Args:
+            items: A mapping or an iterable of (key, value) pairs
+        Returns:
+            The bidirectional dictionary
+        Raises:
+            ValueError: If a key or value is duplicated, or a key is the
+                same as its value
+        """
+        bidict = cls()
+        bidict.update(items)
+        return bidict
+
+    def update(
+        self, items: Mapping[str, str] | Iterable[tuple[str, str]]
+    ) -> None:
+        """
+        Add key-value pairs, validating all of them before adding any.
+
+        Args:
+            items: A mapping or an iterable of (key, value) pairs
+        Raises:
+            ValueError: If a key or value is duplicated, or a key is the
+                same as its value
+        """
+        pairs = list(items.items() if isinstance(items, Mapping) else items)
+
+        # The dictionary holds both directions, so one membership test
+        # covers both the existing keys and the existing values
+        seen: set[str] = set()
+        for key, value in pairs:
+            self._validate(key, value)
+            if key in seen or value in seen:
+                raise ValueError(
+                    f"Duplicate key or value: {key}, {value}. "
+                    f"To update, delete first."
+                )
+            seen.add(key)
+            seen.add(value)
+
+        for key, value in pairs:
+            self._dictionary[key] = value
+            self._dictionary[value] = key
+            self._keys.add(key)
+            self._values.add(value)
+
+    def _validate(self, key: str, value: str) -> None:
+        """
+        Validate that a key-value pair can be added.
+
+        Args:
+            key: The key to add
+            value: The value to add
+        Raises:
+            ValueError: If the key or value already exists, or the key is
+                the same as the value
+        """
+        if key in self._dictionary or value in self._dictionary:
             raise ValueError(
                 f"Duplicate key or value: {key}, {value}. "
                 f"To update, delete first."
             )
         if key == value:
             raise ValueError(f"The key and value cannot be the same: {key}")
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._validate(key, value)
         self._dictionary[key] = value
         self._dictionary[value] = key
         self._keys.add(key)
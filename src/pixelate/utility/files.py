@@ -0,0 +1,38 @@
+import os
+import threading
+from pathlib import Path
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """
+    Atomically write a file, unless it already holds the same bytes.
+
+    The data is written to a temporary file next to ``path``, then renamed
+    over it, so that readers and concurrent writers never see a partial
+    file. An identical file is left untouched, keeping its modification
+    time.
+
+    Args:
+        path: Path to the file to write
+        data: Content of the file
+    Returns:
+        Whether the file was written
+    """
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        # The file does not exist yet, or cannot be read
+        pass
+
+    temp_path = path.with_name(
+        f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return True
@@ -0,0 +1,115 @@
+"""
+Handles watching markdown files for changes.
+"""
+
+import time
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+from pixelate.discovery import scan_markdown_files
+
+# Signature of a file used to detect changes: (modification time, size)
+Signature = tuple[int, int]
+
+
+class Watcher:
+    """
+    Polls a markdown file, or the markdown files of a folder, for changes.
+
+    A change is only reported once the file has stayed the same for the
+    debounce delay, so that a burst of writes from a single save triggers
+    a single render.
+    """
+
+    def __init__(
+        self,
+        input_path: Path,
+        interval: float = 0.25,
+        debounce: float = 0.1,
+        recursive: bool = False,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+    ) -> None:
+        self._input_path = input_path
+        self._recursive = recursive
+        self._include = include
+        self._exclude = exclude
+        self._interval = interval
+        self._debounce = debounce
+        self._known: dict[Path, Signature] = self.snapshot()
+        self._pending: dict[Path, tuple[Signature, float]] = {}
+
+    def snapshot(self) -> dict[Path, Signature]:
+        """
+        Take the signature of every watched markdown file.
+
+        Returns:
+            Mapping of markdown file paths to their signature
+        """
+        if not self._input_path.is_dir():
+            try:
+                stat = self._input_path.stat()
+            except OSError:
+                return {}
+            return {self._input_path: (stat.st_mtime_ns, stat.st_size)}
+
+        signatures: dict[Path, Signature] = {}
+        for entry in scan_markdown_files(
+            self._input_path, self._recursive, self._include, self._exclude
+        ):
+            try:
+                stat = entry.stat()
+            except OSError:
+                # The file was removed while scanning
+                continue
+            signatures[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def poll(self, now: float | None = None) -> list[Path]:
+        """
+        Check the watched files once.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+        Returns:
+            The files created or modified since they were last reported,
+            and unchanged for at least the debounce delay, in sorted order
+        """
+        if now is None:
+            now = time.monotonic()
+        current = self.snapshot()
+
+        # Forget deleted files
+        for path in self._known.keys() - current.keys():
+            del self._known[path]
+        for path in self._pending.keys() - current.keys():
+            del self._pending[path]
+
+        changed: list[Path] = []
+        for path, signature in current.items():
+            if self._known.get(path) == signature:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                # New change, wait until the file settles
+                self._pending[path] = (signature, now)
+                pending = self._pending[path]
+            if now - pending[1] >= self._debounce:
+                self._known[path] = signature
+                del self._pending[path]
+                changed.append(path)
+
+        return sorted(changed)
+
+    def changes(self) -> Iterator[list[Path]]:
+        """
+        Poll the watched files forever.
+
+        Yields:
+            Each non-empty batch of changed files, see poll
+        """
+        while True:
+            time.sleep(self._interval)
+            if changed := self.poll():
+                yield changed
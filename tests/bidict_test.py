@@ -0,0 +1,52 @@
+"""
+Tests for the bidirectional dictionary.
+"""
+
+import pytest
+
+from pixelate.utility.bidict import BiDict
+
+
+class TestBiDict:
+    """Test the BiDict class."""
+
+    def test_lookup_both_directions(self) -> None:
+        bidict = BiDict(red="#FF0000", blue="#0000FF")
+
+        assert bidict["red"] == "#FF0000"
+        assert bidict["#0000FF"] == "blue"
+        assert len(bidict) == 2
+        assert bidict.keys() == {"red", "blue"}
+        assert bidict.values() == {"#FF0000", "#0000FF"}
+
+    def test_duplicate_key_or_value(self) -> None:
+        bidict = BiDict(red="#FF0000")
+
+        with pytest.raises(ValueError, match="Duplicate key or value"):
+            bidict["red"] = "#EE0000"
+        with pytest.raises(ValueError, match="Duplicate key or value"):
+            bidict["crimson"] = "#FF0000"
+        with pytest.raises(ValueError, match="Duplicate key or value"):
+            bidict["#FF0000"] = "crimson"
+        with pytest.raises(ValueError, match="cannot be the same"):
+            bidict["blue"] = "blue"
+
+    def test_from_items(self) -> None:
+        bidict = BiDict.from_items([("red", "#FF0000"), ("blue", "#0000FF")])
+
+        assert bidict.items() == {"red": "#FF0000", "blue": "#0000FF"}
+
+    def test_update_validates_all_pairs_first(self) -> None:
+        bidict = BiDict(red="#FF0000")
+
+        with pytest.raises(ValueError, match="Duplicate key or value"):
+            bidict.update({"blue": "#0000FF", "navy": "#0000FF"})
+        assert "blue" not in bidict
+        assert len(bidict) == 1
+
+        bidict.update({"blue": "#0000FF"})
+        assert bidict["blue"] == "#0000FF"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
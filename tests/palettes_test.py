@@ -2,9 +2,17 @@
 Tests for the color palettes module.
 """
 
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from importlib import resources
+from pathlib import Path
+
 import pytest
 
-from pixelate.palette import PALETTES, resolve_color
+from pixelate.palette import PALETTES, Color, decode, resolve, resolve_color
+from pixelate.palette._compiled import CompiledPalette, compile_palette
+from pixelate.palette._palette import Palettes
 
 
 class TestResolveColor:
@@ -109,6 +117,114 @@ class TestResolveColor:
         with pytest.raises(ValueError, match="Unrecognized color format"):
             resolve_color("rgb(255,0,0)")
 
+    def test_resolve_rgba(self) -> None:
+        """Test that resolve returns both the hex code and RGBA values."""
+        assert resolve("tableau:blue") == Color("#1F77B4", (31, 119, 180, 255))
+        assert resolve("#ff000080") == Color("#FF000080", (255, 0, 0, 128))
+
+    def test_resolve_cache(self) -> None:
+        """Test that repeated color values are served from the cache."""
+        resolve.cache_clear()
+
+        resolve_color("css4:coral")
+        resolve_color("css4:coral")
+        resolve_color("#FF7F50")
+
+        cache_info = resolve.cache_info()
+        assert cache_info.hits == 1
+        assert cache_info.misses == 2
+        assert cache_info.currsize == 2
+
+    def test_decode_resolved_color(self) -> None:
+        """Test that rendering a resolved color does not resolve it again."""
+        resolve.cache_clear()
+        decode.cache_clear()
+
+        hex_color = resolve_color("css4:coral")
+        assert decode(hex_color) == Color("#FF7F50", (255, 127, 80, 255))
+
+        cache_info = decode.cache_info()
+        assert (cache_info.hits, cache_info.misses) == (1, 1)
+        assert resolve.cache_info().currsize == 1
+        with pytest.raises(ValueError, match="Invalid hex color format"):
+            decode("#GG0000")
+
+
+class TestPalettes:
+    """Test the Palettes class."""
+
+    def test_palettes_load_on_first_use(self) -> None:
+        """Test that palettes are only loaded when a color uses them."""
+        script = (
+            "from pixelate.palette import PALETTES, resolve_color\n"
+            "resolve_color('#FF0000')\n"
+            "assert not any(map(PALETTES.is_loaded, PALETTES.names))\n"
+            "resolve_color('tableau:blue')\n"
+            "assert PALETTES.is_loaded('tableau')\n"
+            "assert not PALETTES.is_loaded('xkcd')\n"
+        )
+        subprocess.run([sys.executable, "-c", script], check=True)
+
+    def test_concurrent_first_use(self) -> None:
+        """Test that concurrent first accesses load a palette once."""
+        palettes = Palettes.__new__(Palettes)
+        palettes.__init__()  # type: ignore[misc]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            loaded = list(executor.map(lambda _: palettes["xkcd"], range(8)))
+
+        assert all(palette is loaded[0] for palette in loaded)
+        assert loaded[0]["red"] == "#E50000"
+
+    def test_compiled_palettes_match_toml(self) -> None:
+        """Test that the shipped compiled palettes are up to date."""
+        palette_assets = resources.files("pixelate.palette.assets")
+        for name in PALETTES.names:
+            palette = PALETTES[name]
+            assert isinstance(palette, CompiledPalette)
+
+            with resources.as_file(palette_assets / f"{name}.toml") as path:
+                toml_palette = PALETTES._load_palette(path)
+            assert palette.keys() == toml_palette.keys()
+            for color_name in toml_palette.keys():
+                assert palette[color_name] == toml_palette[color_name]
+
+
+class TestCompiledPalette:
+    """Test the CompiledPalette class."""
+
+    def test_lookup(self, tmp_path: Path) -> None:
+        source = b"toml source"
+        path = tmp_path / "palette.bin"
+        path.write_bytes(
+            compile_palette(
+                {"red": "#FF0000", "glass": "#FFFFFF80", "navy": "#000080"},
+                source,
+            )
+        )
+
+        palette = CompiledPalette.open(path, source)
+
+        assert len(palette) == 3
+        assert palette["red"] == "#FF0000"
+        assert palette["glass"] == "#FFFFFF80"
+        assert palette["navy"] == "#000080"
+        assert "blue" not in palette
+        assert palette.keys() == {"red", "glass", "navy"}
+        with pytest.raises(KeyError):
+            palette["blue"]
+
+    def test_stale_or_invalid(self, tmp_path: Path) -> None:
+        path = tmp_path / "palette.bin"
+        path.write_bytes(compile_palette({"red": "#FF0000"}, b"old source"))
+
+        with pytest.raises(ValueError, match="stale"):
+            CompiledPalette.open(path, b"new source")
+
+        path.write_bytes(b"not a palette")
+        with pytest.raises(ValueError, match="Invalid compiled palette"):
+            CompiledPalette.open(path, b"old source")
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
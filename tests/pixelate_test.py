@@ -2,17 +2,52 @@
 Tests for the pixelate package.
 """
 
-from collections.abc import Generator
+from collections.abc import AsyncIterator, Generator, Iterator
 
+import asyncio
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from pathlib import Path
+from typing import Any
 
 import pytest
+from click.testing import CliRunner
+from PIL import IcoImagePlugin, Image, ImageDraw
 
+from pixelate import (
+    ColorError,
+    FrontmatterError,
+    GridError,
+    OutputFormatError,
+    PixelateError,
+    client,
+    render,
+)
+from pixelate.aio import AsyncPixelator, RenderResult
 from pixelate.app import PixelateApp
+from pixelate.atlas import Rect, pack_shelves
+from pixelate.cache import BuildCache, RenderCache
+from pixelate.cli import main
+from pixelate.discovery import iter_markdown_files
 from pixelate.generator import ImageGenerator
+from pixelate.grid import PixelGrid
+from pixelate.metrics import Metrics, StageRecord
 from pixelate.parser import PixelArtParser
-from pixelate.pixelator import Pixelator
+from pixelate.pixelator import Pixelator, encode
+from pixelate.server import RenderServer
+from pixelate.watcher import Watcher
 
 
 @pytest.fixture
@@ -99,6 +134,166 @@ class TestPixelArtParser:
             if temp_file.exists():
                 temp_file.unlink()
 
+    def test_parse_grid_shapes(self) -> None:
+        parser: PixelArtParser = PixelArtParser()
+        content = (
+            '+++\n"1" = "#FF0000"\n"0" = "#00000000"\n"10" = "#00FF00"\n'
+            '" " = "#0000FF"\n+++\n'
+            "1,0,1\n"
+            "# Comment\n"
+            " 0 , 1,0\n"
+            "10,0,1\n"
+        )
+        expected = [["1", "0", "1"], ["0", "1", "0"], ["10", "0", "1"]]
+
+        color_dict, pixel_grid = parser.parse_text(content, compact=True)
+        assert isinstance(pixel_grid, PixelGrid)
+        assert pixel_grid.keys == tuple(color_dict)
+        assert pixel_grid == expected
+        assert parser.parse_text(content)[1] == expected
+
+    @pytest.mark.parametrize(
+        ("grid", "message"),
+        [
+            ("1,1\n\n1,2\n", r"\{'2'\} at line 6, column 2"),
+            ("1,1\n1, 1 ,x\n", "expected 2, found 3 at line 5"),
+            ("1\n11\n", r"\{'11'\} at line 5, column 1"),
+        ],
+    )
+    def test_parse_invalid_grid_location(
+        self, grid: str, message: str
+    ) -> None:
+        parser: PixelArtParser = PixelArtParser()
+        with pytest.raises(GridError, match=message):
+            parser.parse_text(f'+++\n"1" = "#FF0000"\n+++\n{grid}')
+
+    def test_stream_markdown_file(self, temp_md_file: Path) -> None:
+        parser: PixelArtParser = PixelArtParser()
+        color_dict, rows = parser.stream(temp_md_file)
+
+        assert color_dict == {"1": "#FF0000", "0": "#00000000"}
+        assert list(rows) == parser.parse(temp_md_file)[1]
+
+    def test_stream_invalid_rows(self, tmp_path: Path) -> None:
+        markdown_file = tmp_path / "invalid.md"
+        markdown_file.write_text('+++\n"1" = "#FF0000"\n+++\n1,1\n1,2\n')
+
+        parser: PixelArtParser = PixelArtParser()
+        _, rows = parser.stream(markdown_file)
+
+        assert next(rows) == ["1", "1"]
+        with pytest.raises(ValueError, match="Undefined color keys"):
+            next(rows)
+
+        markdown_file.write_text('"1" = "#FF0000"\n1,1\n')
+        with pytest.raises(ValueError, match="TOML frontmatter"):
+            parser.stream(markdown_file)
+
+    def test_parse_run_length_encoding(
+        self, tmp_path: Path, temp_md_file: Path
+    ) -> None:
+        markdown_file = tmp_path / "rle.md"
+        markdown_file.write_text(
+            '+++\n"1" = "#FF0000"\n"0" = "#00000000"\n'
+            '[grid]\nencoding = "rle"\n+++\n'
+            "1,0,1\n"
+            "# Comment\n"
+            "0,1,0\n"
+            "1,0*1,1\n"
+            "*2\n"
+            "0*3\n"
+        )
+        expected = [
+            ["1", "0", "1"],
+            ["0", "1", "0"],
+            ["1", "0", "1"],
+            ["1", "0", "1"],
+            ["1", "0", "1"],
+            ["0", "0", "0"],
+        ]
+
+        parser: PixelArtParser = PixelArtParser()
+        color_dict, pixel_grid = parser.parse(markdown_file, compact=True)
+        assert color_dict == parser.parse(temp_md_file)[0]
+        assert isinstance(pixel_grid, PixelGrid)
+        assert pixel_grid.keys == ("1", "0")
+        assert pixel_grid == expected
+        assert parser.parse(markdown_file)[1] == expected
+        _, rows = parser.stream(markdown_file)
+        assert list(rows) == expected
+
+        markdown_file.write_text(
+            '+++\n"1" = "#FF0000"\ngrid.encoding = "zip"\n+++\n1\n'
+        )
+        with pytest.raises(ValueError, match="Unknown grid encoding"):
+            parser.parse(markdown_file)
+
+    @pytest.mark.parametrize(
+        ("grid", "message"),
+        [
+            ("1*0\n", "Invalid run-length"),
+            ("1*x\n", "Invalid run-length"),
+            ("1*1_0\n", "Invalid run-length"),
+            ("1*+3\n", "Invalid run-length"),
+            ("1* 3\n", "Invalid run-length"),
+            ("1*\n", "Invalid run-length"),
+            ("1\n*+2\n", "Invalid run-length"),
+            ("*2\n1\n", "Repeated row before the first row"),
+            ("1*2\n1\n", "Inconsistent number of columns"),
+            ("2*2\n", "Undefined color keys"),
+        ],
+    )
+    def test_parse_invalid_run_length_encoding(
+        self, tmp_path: Path, grid: str, message: str
+    ) -> None:
+        markdown_file = tmp_path / "rle.md"
+        markdown_file.write_text(
+            f'+++\n"1" = "#FF0000"\ngrid.encoding = "rle"\n+++\n{grid}'
+        )
+
+        parser: PixelArtParser = PixelArtParser()
+        with pytest.raises(ValueError, match=message):
+            parser.parse(markdown_file)
+
+
+class TestPixelGrid:
+    """Test the PixelGrid class."""
+
+    def test_from_rows(self) -> None:
+        rows = [["1", "0", "1"], ["0", "2", "0"]]
+        pixel_grid = PixelGrid.from_rows(rows, keys=["0", "1"])
+
+        assert pixel_grid.width == 3
+        assert pixel_grid.height == 2
+        assert pixel_grid.keys == ("0", "1", "2")
+        assert pixel_grid.codebook == {"0": 0, "1": 1, "2": 2}
+        assert pixel_grid.codes.typecode == "B"
+        assert pixel_grid.codes.tolist() == [1, 0, 1, 0, 2, 0]
+        assert pixel_grid[1] == ["0", "2", "0"]
+        assert pixel_grid[-1] == ["0", "2", "0"]
+        assert pixel_grid == rows
+
+    def test_from_rows_widens_codes(self) -> None:
+        rows = [
+            [str(col + 300 * row) for col in range(300)] for row in range(2)
+        ]
+        pixel_grid = PixelGrid.from_rows(rows)
+
+        assert pixel_grid.codes.typecode == "H"
+        assert pixel_grid.tolist() == rows
+
+    def test_from_rows_inconsistent_columns(self) -> None:
+        with pytest.raises(ValueError, match="Inconsistent number of columns"):
+            PixelGrid.from_rows([["1", "0"], ["1"]])
+
+    def test_parse_compact(self, temp_md_file: Path) -> None:
+        parser: PixelArtParser = PixelArtParser()
+        color_dict, pixel_grid = parser.parse(temp_md_file, compact=True)
+
+        assert isinstance(pixel_grid, PixelGrid)
+        assert pixel_grid.keys == tuple(color_dict)
+        assert pixel_grid == parser.parse(temp_md_file)[1]
+
 
 class TestImageGenerator:
     """Test the ImageGenerator class."""
@@ -129,6 +324,148 @@ class TestImageGenerator:
         # Cleanup
         output_path.unlink()
 
+    @pytest.mark.parametrize("pixel_size", [1, 3, 10])
+    def test_generate_matches_cell_drawing(self, pixel_size: int) -> None:
+        """Test that the image matches drawing each cell as a rectangle."""
+        generator: ImageGenerator = ImageGenerator()
+        color_dict = {
+            "0": "#00000000",
+            "1": "#FF0000",
+            "2": "#1F77B480",
+            "3": "#GG0000",  # Invalid color, cells are skipped
+        }
+        pixel_grid = [
+            ["1", "2", "0", "1"],
+            ["2", "x", "3", "1"],
+            ["0", "1", "x", "2"],
+            ["1", "0"],  # Short row, remaining cells are skipped
+        ]
+
+        expected = Image.new(
+            "RGBA", (4 * pixel_size, 4 * pixel_size), (255, 255, 255, 0)
+        )
+        draw = ImageDraw.Draw(expected)
+        for row_idx, row in enumerate(pixel_grid):
+            for col_idx, cell_value in enumerate(row):
+                if cell_value not in ("0", "1", "2"):
+                    continue
+                x1, y1 = col_idx * pixel_size, row_idx * pixel_size
+                draw.rectangle(
+                    (x1, y1, x1 + pixel_size, y1 + pixel_size),
+                    fill=generator.hex_to_rgba(color_dict[cell_value]),
+                )
+
+        image = generator.generate(color_dict, pixel_grid, pixel_size)
+
+        assert image.mode == expected.mode
+        assert image.size == expected.size
+        assert image.tobytes() == expected.tobytes()
+
+    def test_generate_from_pixel_grid(self, temp_md_file: Path) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        parser: PixelArtParser = PixelArtParser()
+
+        color_dict, pixel_grid = parser.parse(temp_md_file)
+        compact_grid = PixelGrid.from_rows(pixel_grid, color_dict)
+
+        image = generator.generate(color_dict, pixel_grid, pixel_size=4)
+        compact_image = generator.generate(
+            color_dict, compact_grid, pixel_size=4
+        )
+
+        assert compact_image.tobytes() == image.tobytes()
+
+    def test_generate_rows(self, temp_md_file: Path) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        parser: PixelArtParser = PixelArtParser()
+
+        color_dict, pixel_grid = parser.parse(temp_md_file)
+        image = generator.generate(color_dict, pixel_grid, pixel_size=4)
+
+        color_dict, rows = parser.stream(temp_md_file)
+        streamed_image = generator.generate_rows(color_dict, rows, 4)
+
+        assert streamed_image.tobytes() == image.tobytes()
+
+        with pytest.raises(ValueError, match="Pixel grid is empty"):
+            generator.generate_rows(color_dict, iter([]), 4)
+
+    def test_skipped_cells_are_warned_once_per_value(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        color_dict = {"1": "#FF0000", "2": "#GG0000"}
+        pixel_grid = [["x", "2", "x"], ["1", "x", "2"]]
+
+        generator.generate(color_dict, pixel_grid, 1)
+
+        assert [record.getMessage() for record in caplog.records] == [
+            "Color not found for value 'x', "
+            "skipped 3 cell(s), first at (0, 0)",
+            "Invalid hex color format: #GG0000, "
+            "skipped 2 cell(s), first at (0, 1)",
+        ]
+
+    @pytest.mark.parametrize(
+        ("total_colors", "bits"), [(2, 1), (3, 2), (16, 4), (17, 8)]
+    )
+    def test_generate_indexed(self, total_colors: int, bits: int) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        color_dict = {
+            str(code): f"#{code:02X}{255 - code:02X}00" for code in range(20)
+        }
+        color_dict["0"] = "#00000000"
+        color_dict["1"] = "#1F77B480"
+        pixel_grid = PixelGrid.from_rows(
+            [
+                [str((row + col) % total_colors) for col in range(64)]
+                for row in range(64)
+            ],
+            color_dict,
+        )
+
+        image, rgba_image = (
+            generator.generate_sizes(color_dict, pixel_grid, [3], indexed)[0]
+            for indexed in (True, False)
+        )
+        assert image.mode == "P"
+        assert image.convert("RGBA").tobytes() == rgba_image.tobytes()
+
+        # Only the colors in use are stored, with as few bits as possible
+        png = encode([image], "png")
+        assert png[24] == bits
+        assert len(png) < len(encode([rgba_image], "png"))
+        with Image.open(io.BytesIO(png)) as decoded:
+            assert decoded.mode == "P"
+            assert decoded.convert("RGBA").tobytes() == rgba_image.tobytes()
+
+    def test_encode_indexed_formats(self) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        color_dict = {"0": "#00000000", "1": "#FF0000", "2": "#00FF0080"}
+        pixel_grid = PixelGrid.from_rows([["0", "1"], ["1", "0"]], color_dict)
+        (image,) = generator.generate_sizes(
+            color_dict, pixel_grid, [16], indexed=True
+        )
+        rgba = image.convert("RGBA").tobytes()
+
+        # Formats without the alpha of each color are written as RGBA
+        with Image.open(io.BytesIO(encode([image], "ico"))) as decoded:
+            assert decoded.convert("RGBA").tobytes() == rgba
+
+        # GIF keeps a single fully transparent color
+        with Image.open(io.BytesIO(encode([image], "gif"))) as decoded:
+            assert decoded.mode == "P"
+            assert decoded.convert("RGBA").tobytes() == rgba
+
+    def test_generate_indexed_fallback(self) -> None:
+        generator: ImageGenerator = ImageGenerator()
+        color_dict = {f"k{code}": "#FF0000" for code in range(300)}
+        pixel_grid = PixelGrid.from_rows([["k0", "k299"]], color_dict)
+        (image,) = generator.generate_sizes(
+            color_dict, pixel_grid, [1], indexed=True
+        )
+        assert image.mode == "RGBA"
+
 
 class TestFileProcessor:
     """Test the FileProcessor class."""
@@ -144,31 +481,960 @@ class TestFileProcessor:
         # Cleanup
         output_path.unlink()
 
+    def test_process_markdown_file_streaming(self, tmp_path: Path) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text('+++\n"1" = "#FF0000"\n+++\n1,1\n1,1\n')
+
+        processor: Pixelator = Pixelator(stream=True)
+
+        assert processor.process(markdown_file, pixel_size=2)
+        with Image.open(tmp_path / "icon.png") as image:
+            assert image.size == (4, 4)
+
+    def test_process_several_sizes_and_formats(self, tmp_path: Path) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text('+++\n"1" = "#FF0000"\n+++\n1,1\n1,1\n')
+
+        processor: Pixelator = Pixelator()
+
+        assert processor.process(
+            markdown_file, pixel_size=[1, 4, 16], format=["png", "ico"]
+        )
+        for pixel_size in (1, 4, 16):
+            with Image.open(tmp_path / f"icon-{pixel_size}.png") as image:
+                assert image.size == (2 * pixel_size, 2 * pixel_size)
+        assert not (tmp_path / "icon.png").exists()
+
+        # Every size is stored in a single icon
+        with Image.open(tmp_path / "icon.ico") as image:
+            assert isinstance(image, IcoImagePlugin.IcoImageFile)
+            assert image.ico.sizes() == {(2, 2), (8, 8), (32, 32)}
+
+    def test_process_indexed(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+        output_path = tmp_path / "icon.png"
+
+        processor: Pixelator = Pixelator()
+        cache = BuildCache.in_directory(tmp_path)
+        assert processor.process(markdown_file, cache=cache)
+        rgba_png = output_path.read_bytes()
+
+        # The indexed image is not reused from the RGBA render
+        assert processor.process(markdown_file, cache=cache, indexed=True)
+        with Image.open(output_path) as image:
+            assert image.mode == "P"
+            with Image.open(io.BytesIO(rgba_png)) as rgba_image:
+                assert image.convert("RGBA").tobytes() == rgba_image.tobytes()
+        assert len(output_path.read_bytes()) < len(rgba_png)
+
+    def test_process_skips_identical_output(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+        output_path = tmp_path / "icon.png"
+
+        processor: Pixelator = Pixelator()
+        assert processor.process(markdown_file)
+        os.utime(output_path, ns=(0, 0))
+
+        # The same image leaves the file untouched
+        assert processor.process(markdown_file)
+        assert output_path.stat().st_mtime_ns == 0
+
+        # A different image replaces it, without leftover temporary files
+        assert processor.process(markdown_file, pixel_size=2)
+        assert output_path.stat().st_mtime_ns != 0
+        with Image.open(output_path) as image:
+            assert image.size == (6, 6)
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "icon.md",
+            "icon.png",
+        ]
+
+    def test_process_many(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        markdown_files: list[Path] = []
+        for name in ("a", "b", "c"):
+            markdown_file = tmp_path / f"{name}.md"
+            markdown_file.write_text(
+                sample_markdown_content if name != "b" else "invalid"
+            )
+            markdown_files.append(markdown_file)
+
+        processor: Pixelator = Pixelator()
+        results = processor.process_many(markdown_files, tmp_path, jobs=2)
+
+        assert results == [True, False, True]
+        # Messages of the worker processes are handled by this process
+        assert f"Failed to process {markdown_files[1]}" in caplog.text
+        assert (tmp_path / "a.png").exists()
+        assert not (tmp_path / "b.png").exists()
+        assert (tmp_path / "c.png").exists()
+
+
+class TestBuildCache:
+    """Test the BuildCache class."""
+
+    def test_skip_up_to_date_file(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+        output_path = tmp_path / "icon.png"
+
+        cache = BuildCache.in_directory(tmp_path)
+        assert not cache.is_current(
+            markdown_file, [output_path], [10], ["png"]
+        )
+
+        processor: Pixelator = Pixelator()
+        assert processor.process(markdown_file, cache=cache)
+        cache.save()
+        assert cache.manifest_path.exists()
+
+        # A reloaded manifest recognizes the output as up to date
+        cache = BuildCache.in_directory(tmp_path)
+        assert cache.is_current(markdown_file, [output_path], [10], ["png"])
+        assert not cache.is_current(
+            markdown_file, [output_path], [20], ["png"]
+        )
+
+        # Other settings, a missing output or new content are stale
+        output_path.unlink()
+        assert not cache.is_current(
+            markdown_file, [output_path], [10], ["png"]
+        )
+        assert processor.process(markdown_file, cache=cache)
+        assert cache.is_current(markdown_file, [output_path], [10], ["png"])
+        markdown_file.write_text(sample_markdown_content + "1,1,1\n")
+        assert not cache.is_current(
+            markdown_file, [output_path], [10], ["png"]
+        )
+
+    @pytest.mark.parametrize("jobs", [None, 1])
+    def test_edit_while_rendering_is_stale(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        monkeypatch: pytest.MonkeyPatch,
+        jobs: int | None,
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+        output_path = tmp_path / "icon.png"
+
+        processor: Pixelator = Pixelator()
+        process = processor._process
+
+        def edited_process(*args: Any) -> bool:
+            success = process(*args)
+            # The file is saved again once its content has been read
+            markdown_file.write_text(sample_markdown_content + "1,1,1\n")
+            return success
+
+        monkeypatch.setattr(processor, "_process", edited_process)
+        cache = BuildCache.in_directory(tmp_path)
+        if jobs is None:
+            assert processor.process(markdown_file, cache=cache)
+        else:
+            assert processor.process_many(
+                [markdown_file], jobs=jobs, cache=cache
+            ) == [True]
+
+        assert not cache.is_current(
+            markdown_file, [output_path], [10], ["png"]
+        )
+
+    def test_force_renders_up_to_date_file(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        caplog.set_level(logging.INFO)
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+
+        processor: Pixelator = Pixelator()
+        cache = BuildCache.in_directory(tmp_path)
+        processor.process_many([markdown_file], tmp_path, cache=cache)
+        assert "Pixel icon saved" in caplog.text
+
+        caplog.clear()
+        processor.process_many([markdown_file], tmp_path, cache=cache)
+        assert "Skipping up-to-date file" in caplog.text
+
+        caplog.clear()
+        processor.process_many(
+            [markdown_file], tmp_path, cache=cache, force=True
+        )
+        # The file is rendered again, but its identical output is kept
+        assert "Processing file" in caplog.text
+        assert "Pixel icon unchanged" in caplog.text
+
+
+class TestRenderCache:
+    """Test the RenderCache class."""
+
+    def test_reuse_identical_render(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        caplog.set_level(logging.INFO)
+        (tmp_path / "a.md").write_text(sample_markdown_content)
+        # The same pixels under other color keys
+        (tmp_path / "b.md").write_text(
+            sample_markdown_content.replace('"1"', '"x"').replace("1", "x")
+        )
+        (tmp_path / "c.md").write_text(
+            sample_markdown_content.replace("#FF0000", "#00FF00")
+        )
+
+        app = PixelateApp()
+        app.run(str(tmp_path), 4, "png", jobs=1)
+        render_cache = app._pixelator.render_cache
+        assert (render_cache.hits, render_cache.misses) == (1, 2)
+        assert "Render cache: 1 hit(s), 2 miss(es)" in caplog.text
+        assert (tmp_path / "a.png").read_bytes() == (
+            tmp_path / "b.png"
+        ).read_bytes()
+        assert (tmp_path / "a.png").read_bytes() != (
+            tmp_path / "c.png"
+        ).read_bytes()
+
+    def test_reuse_across_runs(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_files: list[Path] = []
+        for name in ("a", "b", "c"):
+            markdown_file = tmp_path / f"{name}.md"
+            markdown_file.write_text(sample_markdown_content)
+            markdown_files.append(markdown_file)
+        cache_dir = tmp_path / "cache"
+
+        render_cache = RenderCache(cache_dir)
+        processor: Pixelator = Pixelator(render_cache=render_cache)
+        assert processor.process(markdown_files[0], pixel_size=[1, 2])
+        assert (render_cache.hits, render_cache.misses) == (0, 2)
+
+        # A new cache, or worker processes, find the encoded images on disk
+        render_cache = RenderCache(cache_dir)
+        processor = Pixelator(render_cache=render_cache)
+        assert processor.process_many(
+            markdown_files[1:], pixel_size=[1, 2], jobs=2
+        ) == [True, True]
+        assert (render_cache.hits, render_cache.misses) == (4, 0)
+        for size in (1, 2):
+            assert (tmp_path / f"a-{size}.png").read_bytes() == (
+                tmp_path / f"c-{size}.png"
+            ).read_bytes()
+
+    def test_evict_least_recently_used(self) -> None:
+        render_cache = RenderCache(max_bytes=8)
+        render_cache.put("a", b"1234")
+        render_cache.put("b", b"5678")
+        assert render_cache.get("a") == b"1234"
+
+        # "b" was used least recently
+        render_cache.put("c", b"9")
+        assert render_cache.get("b") is None
+        assert render_cache.get("a") == b"1234"
+        assert render_cache.get("c") == b"9"
+        assert (render_cache.hits, render_cache.misses) == (3, 1)
+
+
+class TestMetrics:
+    """Test the Metrics class."""
+
+    def test_record_stages(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_files: list[Path] = []
+        for name, color in (("a", "#FF0000"), ("b", "#00FF00")):
+            # Different pixels, so that both files are rendered
+            markdown_file = tmp_path / f"{name}.md"
+            markdown_file.write_text(
+                sample_markdown_content.replace("#FF0000", color)
+            )
+            markdown_files.append(markdown_file)
+
+        received: list[StageRecord] = []
+        metrics = Metrics(trace_memory=True, callback=received.append)
+        processor: Pixelator = Pixelator(metrics=metrics)
+        assert processor.process_many(markdown_files, jobs=2) == [True, True]
+
+        assert received == metrics.records
+        assert {record.stage for record in metrics.records} == {
+            "read",
+            "toml",
+            "resolve",
+            "grid",
+            "render",
+            "encode",
+            "total",
+        }
+        assert all(record.allocated is not None for record in received)
+
+        summary = metrics.summary()
+        assert summary["files"] == 2
+        assert summary["stages"]["render"]["count"] == 2
+        assert {entry["file"] for entry in summary["slowest"]} == {
+            str(markdown_file) for markdown_file in markdown_files
+        }
+
+    def test_export_chrome_trace(self, temp_md_file: Path) -> None:
+        metrics = Metrics()
+        processor: Pixelator = Pixelator(metrics=metrics)
+        assert processor.process(temp_md_file)
+
+        trace_path = temp_md_file.with_suffix(".trace.json")
+        try:
+            metrics.export_chrome_trace(trace_path)
+            events = json.loads(trace_path.read_text())["traceEvents"]
+        finally:
+            trace_path.unlink()
+
+        assert [event["name"] for event in events][-1] == "total"
+        assert all(event["ph"] == "X" for event in events)
+        assert all(event["args"]["allocated"] is None for event in events)
+
+    @pytest.mark.parametrize(
+        "options, traced",
+        [(["--profile"], False), (["--profile-memory"], True)],
+    )
+    def test_profile_memory_is_opt_in(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        options: list[str],
+        traced: bool,
+    ) -> None:
+        markdown_file = tmp_path / "a.md"
+        markdown_file.write_text(sample_markdown_content)
+        profile_output = tmp_path / "profile.json"
+
+        result = CliRunner().invoke(
+            main,
+            [
+                str(markdown_file),
+                *options,
+                "--profile-output",
+                str(profile_output),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+
+        records = json.loads(profile_output.read_text())["records"]
+        assert records
+        assert all(
+            (record["allocated"] is not None) == traced for record in records
+        )
+
+
+class TestAtlas:
+    """Test the atlas packing."""
+
+    def test_pack_shelves(self) -> None:
+        sizes = [(3, 2), (5, 5), (1, 4), (2, 2), (4, 1), (2, 3)]
+
+        rects, (width, height) = pack_shelves(sizes)
+
+        assert [(rect.width, rect.height) for rect in rects] == sizes
+        for index, rect in enumerate(rects):
+            assert 0 <= rect.x and rect.x + rect.width <= width
+            assert 0 <= rect.y and rect.y + rect.height <= height
+            for other in rects[index + 1 :]:
+                assert (
+                    rect.x + rect.width <= other.x
+                    or other.x + other.width <= rect.x
+                    or rect.y + rect.height <= other.y
+                    or other.y + other.height <= rect.y
+                )
+        assert pack_shelves([]) == ([], (0, 0))
+
+    def test_run_atlas(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        (tmp_path / "a.md").write_text(sample_markdown_content)
+        (tmp_path / "b.md").write_text('+++\n"1" = "#0000FF"\n+++\n1,1\n')
+        (tmp_path / "c.md").write_text("invalid")
+        atlas_path = tmp_path / "atlas.png"
+
+        app: PixelateApp = PixelateApp()
+        app.run(
+            str(tmp_path), pixel_size=2, format="png", atlas=str(atlas_path)
+        )
+
+        index = json.loads((tmp_path / "atlas.json").read_text())
+        assert index["image"] == "atlas.png"
+        assert set(index["sprites"]) == {"a", "b"}
+        assert not (tmp_path / "a.png").exists()
+
+        generator: ImageGenerator = ImageGenerator()
+        with Image.open(atlas_path) as atlas:
+            assert atlas.size == (index["width"], index["height"])
+            rect = Rect(**index["sprites"]["b"])
+            sprite = atlas.crop(
+                (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+            )
+            expected = generator.generate({"1": "#0000FF"}, [["1", "1"]], 2)
+            assert sprite.tobytes() == expected.tobytes()
+
+    @pytest.mark.parametrize("atlas_name", ["atlas.jpg", "atlas.nope"])
+    def test_run_atlas_invalid_format(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        atlas_name: str,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        (tmp_path / "a.md").write_text(sample_markdown_content)
+        atlas_path = tmp_path / atlas_name
+
+        app: PixelateApp = PixelateApp()
+        with pytest.raises(SystemExit) as exit_info:
+            app.run(str(tmp_path), 2, "png", atlas=str(atlas_path))
+
+        assert exit_info.value.code == 1
+        assert "Failed to write atlas" in caplog.text
+        assert not atlas_path.exists()
+        assert not (tmp_path / "atlas.json").exists()
+
+
+class TestDiscovery:
+    """Test the discovery of markdown files."""
+
+    @pytest.fixture
+    def tree(self, tmp_path: Path) -> Path:
+        for relative in [
+            "b.md",
+            "a.md",
+            "notes.txt",
+            "icons/z.md",
+            "icons/small/y.MD",
+            "drafts/x.md",
+            "alpha/w.md",
+        ]:
+            path = tmp_path / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+        return tmp_path
+
+    def test_walk_order(self, tree: Path) -> None:
+        def relative(recursive: bool = False) -> list[str]:
+            return [
+                path.relative_to(tree).as_posix()
+                for path in iter_markdown_files(tree, recursive)
+            ]
+
+        assert relative() == ["a.md", "b.md"]
+        # Files of a folder come before its subfolders, in sorted order
+        assert relative(recursive=True) == [
+            "a.md",
+            "b.md",
+            "alpha/w.md",
+            "drafts/x.md",
+            "icons/z.md",
+            "icons/small/y.MD",
+        ]
+
+    def test_include_exclude(self, tree: Path) -> None:
+        def relative(
+            include: tuple[str, ...] = (), exclude: tuple[str, ...] = ()
+        ) -> list[str]:
+            return [
+                path.relative_to(tree).as_posix()
+                for path in iter_markdown_files(tree, True, include, exclude)
+            ]
+
+        # Patterns without "/" match names, others match relative paths
+        assert relative(include=("?.md",)) == [
+            "a.md",
+            "b.md",
+            "alpha/w.md",
+            "drafts/x.md",
+            "icons/z.md",
+        ]
+        assert relative(include=("icons/*",)) == [
+            "icons/z.md",
+            "icons/small/y.MD",
+        ]
+        # Excluded folders are pruned
+        assert relative(exclude=("drafts", "small", "a*.md")) == [
+            "b.md",
+            "alpha/w.md",
+            "icons/z.md",
+        ]
+
+
+class TestWatcher:
+    """Test the Watcher class."""
+
+    def test_poll_reports_settled_changes(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        first_file = tmp_path / "first.md"
+        first_file.write_text(sample_markdown_content)
+        (tmp_path / "notes.txt").write_text("not watched")
+
+        watcher = Watcher(tmp_path, debounce=1.0)
+        assert watcher.poll(now=0.0) == []
+
+        # Changes are reported once they settle for the debounce delay
+        second_file = tmp_path / "second.md"
+        second_file.write_text(sample_markdown_content)
+        first_file.write_text(sample_markdown_content + "1,1,1\n")
+        assert watcher.poll(now=10.0) == []
+        assert watcher.poll(now=10.5) == []
+        assert watcher.poll(now=11.0) == [first_file, second_file]
+        assert watcher.poll(now=12.0) == []
+
+        # A new write restarts the debounce delay
+        second_file.write_text(sample_markdown_content + "0,0,0\n")
+        assert watcher.poll(now=20.0) == []
+        second_file.write_text(sample_markdown_content)
+        assert watcher.poll(now=20.8) == []
+        assert watcher.poll(now=21.5) == []
+        assert watcher.poll(now=21.8) == [second_file]
+
+        second_file.unlink()
+        assert watcher.poll(now=30.0) == []
+
+    def test_watch_changes_during_first_run(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        markdown_file = tmp_path / "saved.md"
+
+        def first_run(*args: object) -> None:
+            # The file is saved while the first run renders
+            markdown_file.write_text(sample_markdown_content)
+
+        def changes(watcher: Watcher) -> Iterator[list[Path]]:
+            watcher.poll(now=0.0)
+            yield watcher.poll(now=1.0)
+
+        app: PixelateApp = PixelateApp()
+        monkeypatch.setattr(app, "run", first_run)
+        monkeypatch.setattr(Watcher, "changes", changes)
+        app.watch(str(tmp_path), 1, "png")
+
+        assert markdown_file.with_suffix(".png").exists()
+
+
+class TestRender:
+    """Test the in-memory render API."""
+
+    def test_render_sources(self, sample_markdown_content: str) -> None:
+        png = render(sample_markdown_content, 2)
+        with Image.open(io.BytesIO(png)) as image:
+            assert image.format == "PNG"
+            assert image.size == (6, 6)
+
+        # Bytes, grids and images give the same pixels
+        assert render(sample_markdown_content.encode(), 2) == png
+        grid = [["1", "0", "1"], ["0", "1", "0"], ["1", "0", "1"]]
+        colors = {"1": "#FF0000", "0": "#00000000"}
+        assert render(grid, 2, colors=colors) == png
+        assert render(PixelGrid.from_rows(grid), 2, colors=colors) == png
+        rendered = render(sample_markdown_content, 2, format=None)
+        assert rendered.getpixel((0, 0)) == (255, 0, 0, 255)
+        assert rendered.getpixel((2, 0)) == (0, 0, 0, 0)
+
+        # Several sizes are held by a single icon
+        with Image.open(
+            io.BytesIO(render(grid, [1, 4], "ico", colors))
+        ) as ico:
+            assert isinstance(ico, IcoImagePlugin.IcoImageFile)
+            assert ico.ico.sizes() == {(3, 3), (12, 12)}
+
+    @pytest.mark.parametrize(
+        "source, options, error",
+        [
+            ("no frontmatter", {}, FrontmatterError),
+            ('+++\n"1" = "#FF0000"\n+++\n', {}, GridError),
+            ('+++\n"1" = "#FF0000"\n+++\n1,2\n', {}, GridError),
+            ('+++\n"1" = "#FF0000"\n+++\n1,1\n1\n', {}, GridError),
+            ('+++\n"1" = "css4:nope"\n+++\n1\n', {}, ColorError),
+            (b"\xff", {}, PixelateError),
+            (
+                '+++\n"1" = "#FF0000"\n+++\n1\n',
+                {"format": "jpeg"},
+                OutputFormatError,
+            ),
+            (
+                '+++\n"1" = "#FF0000"\n+++\n1\n',
+                {"pixel_size": 0},
+                PixelateError,
+            ),
+            (
+                '+++\n"1" = "#FF0000"\n+++\n1\n',
+                {"pixel_size": -2},
+                PixelateError,
+            ),
+            (
+                '+++\n"1" = "#FF0000"\n+++\n1\n',
+                {"pixel_size": [4, 0], "format": "ico"},
+                PixelateError,
+            ),
+        ],
+    )
+    def test_render_errors(
+        self,
+        source: str | bytes,
+        options: dict[str, Any],
+        error: type[PixelateError],
+    ) -> None:
+        with pytest.raises(error):
+            render(source, **options)
+
+    def test_render_grid_errors(self) -> None:
+        with pytest.raises(GridError, match="Undefined color keys"):
+            render([["1", "2"]], colors={"1": "#FF0000"})
+        with pytest.raises(GridError, match="Inconsistent"):
+            render([["1", "1"], ["1"]], colors={"1": "#FF0000"})
+        with pytest.raises(ColorError):
+            render([["1"]], colors={"1": "blue"})
+        with pytest.raises(OutputFormatError):
+            render([["1"]], colors={"1": "#FF0000"}, format="nope")
+        with pytest.raises(OutputFormatError):
+            render([["1"]], [1, 2], "png", colors={"1": "#FF0000"})
+        with pytest.raises(TypeError):
+            render([["1"]])
+
+
+class TestAsyncPixelator:
+    """Test the AsyncPixelator class."""
+
+    @pytest.mark.parametrize("executor_type", [None, ProcessPoolExecutor])
+    def test_render(
+        self,
+        tmp_path: Path,
+        sample_markdown_content: str,
+        executor_type: type[ProcessPoolExecutor] | None,
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+
+        async def main(executor: Executor | None) -> list[bytes]:
+            pixelator = AsyncPixelator(executor)
+            return [
+                await pixelator.render(sample_markdown_content, 2),
+                await pixelator.render(markdown_file, 2),
+                await pixelator.render(markdown_file, 2, indexed=True),
+            ]
+
+        if executor_type is None:
+            results = asyncio.run(main(None))
+        else:
+            with executor_type(max_workers=1) as executor:
+                results = asyncio.run(main(executor))
+        assert results[:2] == [render(sample_markdown_content, 2)] * 2
+        assert results[2] == render(sample_markdown_content, 2, indexed=True)
+        with Image.open(io.BytesIO(results[2])) as image:
+            assert image.mode == "P"
+
+    def test_render_many(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
+        sources: list[str | Path] = [
+            sample_markdown_content,
+            "invalid",
+            markdown_file,
+            tmp_path / "missing.md",
+        ]
+
+        async def main() -> list[RenderResult]:
+            pixelator = AsyncPixelator(concurrency=2)
+            return [
+                result
+                async for result in pixelator.render_many(
+                    sources, 2, indexed=True
+                )
+            ]
+
+        results = sorted(asyncio.run(main()))
+        assert [result.source for result in results] == sources
+        expected = render(sample_markdown_content, 2, indexed=True)
+        assert results[0].data == results[2].data == expected
+        assert isinstance(results[1].error, FrontmatterError)
+        assert isinstance(results[3].error, FileNotFoundError)
+
+    def test_render_many_bounds_work(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        lock = threading.Lock()
+        running = max_running = 0
+
+        def slow_render(source: str, *args: object) -> bytes:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return source.encode()
+
+        monkeypatch.setattr("pixelate.aio.render", slow_render)
+        pulled = 0
+
+        async def sources() -> AsyncIterator[str]:
+            nonlocal pulled
+            for index in range(100):
+                pulled += 1
+                yield str(index)
+
+        async def main() -> list[RenderResult]:
+            results: list[RenderResult] = []
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                pixelator = AsyncPixelator(executor, concurrency=3)
+                async for result in pixelator.render_many(sources()):
+                    results.append(result)
+                    if len(results) == 5:
+                        break
+            return results
+
+        results = asyncio.run(main())
+        assert len(results) == 5
+        assert max_running <= 3
+        # Sources are only pulled as results are consumed
+        assert pulled <= 5 + 3
+
+
+class TestRenderServer:
+    """Test the RenderServer class and its client."""
+
+    @pytest.fixture
+    def socket_path(self, tmp_path: Path) -> Generator[Path]:
+        socket_path = tmp_path / "pixelate.sock"
+        server = RenderServer(socket_path, PixelateApp())
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield socket_path
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+    def test_run(
+        self,
+        tmp_path: Path,
+        socket_path: Path,
+        sample_markdown_content: str,
+    ) -> None:
+        (tmp_path / "icon.md").write_text(sample_markdown_content)
+
+        result = client.run(
+            str(tmp_path / "icon.md"), [2], ["png"], socket_path=socket_path
+        )
+        assert result is not None
+        status, messages = result
+        assert status == 0
+        assert f"Pixel icon saved to: {tmp_path / 'icon.png'}" in messages
+        with Image.open(tmp_path / "icon.png") as image:
+            assert image.size == (6, 6)
+
+        # Errors are reported to the client with the exit status
+        assert client.run(
+            str(tmp_path / "missing.md"),
+            [2],
+            ["png"],
+            quiet=True,
+            socket_path=socket_path,
+        ) == (1, [f"Error: Path '{tmp_path / 'missing.md'}' does not exist"])
+
+    def test_render(
+        self,
+        tmp_path: Path,
+        socket_path: Path,
+        sample_markdown_content: str,
+    ) -> None:
+        (tmp_path / "icon.md").write_text(sample_markdown_content)
+        expected = render(sample_markdown_content, 3)
+
+        assert (
+            client.render(sample_markdown_content, 3, socket_path=socket_path)
+            == expected
+        )
+        assert (
+            client.render(tmp_path / "icon.md", 3, socket_path=socket_path)
+            == expected
+        )
+        with pytest.raises(client.ServerError, match="frontmatter"):
+            client.render("invalid", 3, socket_path=socket_path)
+
+    def test_no_server(self, tmp_path: Path) -> None:
+        socket_path = tmp_path / "pixelate.sock"
+        assert client.send({"command": "ping"}, socket_path) is None
+        with pytest.raises(ConnectionError):
+            client.render("", socket_path=socket_path)
+
+        # Only sockets of the current user are trusted
+        socket_path.write_text("")
+        assert client.send({"command": "ping"}, socket_path) is None
+
+    def test_serve_stream(self) -> None:
+        result = CliRunner().invoke(main, ["--serve", "--stream"])
+        assert result.exit_code == 2
+        assert "--stream cannot be used with --serve" in result.output
+
+    def test_private_socket(self, socket_path: Path) -> None:
+        assert socket_path.stat().st_mode & 0o777 == 0o600
+        assert client.is_trusted(socket_path)
+
+    def test_refuse_other_version(
+        self,
+        tmp_path: Path,
+        socket_path: Path,
+        sample_markdown_content: str,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        (tmp_path / "icon.md").write_text(sample_markdown_content)
+        monkeypatch.setattr(client, "package_version", lambda: "0.0.0")
+
+        response = client.send({"command": "ping"}, socket_path)
+        assert response is not None
+        assert response["version"] != "0.0.0"
+
+        # The run is left to the client, without any output
+        assert (
+            client.run(
+                str(tmp_path / "icon.md"),
+                [2],
+                ["png"],
+                socket_path=socket_path,
+            )
+            is None
+        )
+        assert not (tmp_path / "icon.png").exists()
+        with pytest.raises(client.ServerError, match="restart"):
+            client.render(sample_markdown_content, socket_path=socket_path)
+
+
+class TestStartup:
+    """Test the start-up of the command line."""
+
+    @staticmethod
+    def import_times() -> dict[str, int]:
+        """
+        Run the help of the command line, and get its import times.
+
+        Returns:
+            Mapping of the imported modules to their cumulative import
+            time, in microseconds
+        """
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "from pixelate.cli import main; main(['--help'])",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert "Usage:" in result.stdout
+
+        # Lines are "import time: <self> | <cumulative> | <module>"
+        import_times: dict[str, int] = {}
+        for line in result.stderr.splitlines()[1:]:
+            _, cumulative, module = line.split("|")
+            import_times[module.strip()] = int(cumulative)
+        return import_times
+
+    def test_help_imports(self) -> None:
+        # Pillow, the palettes and the package metadata are not loaded
+        assert not [
+            module
+            for module in self.import_times()
+            if module.startswith(("PIL", "pixelate.palette"))
+            or module in ("pixelate.app", "importlib.metadata")
+        ]
+
+    @pytest.mark.skipif(
+        "PIXELATE_IMPORT_BUDGET" not in os.environ,
+        reason="Wall-clock budget, set PIXELATE_IMPORT_BUDGET (in "
+        "microseconds) to check it on a quiet machine",
+    )
+    def test_help_import_time(self) -> None:
+        budget = int(os.environ["PIXELATE_IMPORT_BUDGET"])
+        assert self.import_times()["pixelate.cli"] < budget
+
 
 class TestPixelateApp:
     """Test the main PixelateApp class."""
 
-    def test_run_single_file(self, temp_md_file: Path) -> None:
+    def test_run_single_file(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        markdown_file = tmp_path / "icon.md"
+        markdown_file.write_text(sample_markdown_content)
         app: PixelateApp = PixelateApp()
 
-        app.run(str(temp_md_file), pixel_size=10, format="png")
-
-        output_path: Path = temp_md_file.with_suffix(".png")
-        assert output_path.exists()
+        app.run(str(markdown_file), pixel_size=10, format="png")
 
-        # Cleanup
-        output_path.unlink()
+        assert (tmp_path / "icon.png").exists()
 
-    def test_run_folder(self, temp_md_file: Path) -> None:
+    def test_run_folder(
+        self, tmp_path: Path, sample_markdown_content: str
+    ) -> None:
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.md").write_text(sample_markdown_content)
         app: PixelateApp = PixelateApp()
 
-        app.run(str(temp_md_file.parent), pixel_size=10, format="png")
+        app.run(str(tmp_path), pixel_size=10, format="png")
 
-        output_path: Path = temp_md_file.with_suffix(".png")
-        assert output_path.exists()
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            ".pixelate-cache.json",
+            "a.md",
+            "a.png",
+            "b.md",
+            "b.png",
+        ]
 
-        # Cleanup
-        output_path.unlink()
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_run_recursive_output_dir(
+        self, tmp_path: Path, sample_markdown_content: str, jobs: int
+    ) -> None:
+        source = tmp_path / "source"
+        for relative in ["top.md", "icons/bird.md", "icons/old/draft.md"]:
+            path = source / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(sample_markdown_content)
+
+        app: PixelateApp = PixelateApp()
+        app.run(
+            str(source),
+            pixel_size=1,
+            format="png",
+            jobs=jobs,
+            recursive=True,
+            exclude=["old"],
+            output_dir=str(tmp_path / "build"),
+        )
+
+        # The folder structure is mirrored under the output directory
+        assert sorted(
+            path.relative_to(tmp_path / "build").as_posix()
+            for path in (tmp_path / "build").rglob("*.png")
+        ) == ["icons/bird.png", "top.png"]
+        assert not list(source.rglob("*.png"))
 
 
 if __name__ == "__main__":